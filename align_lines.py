@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+align_lines.py - Align german_autumn_lines.txt with Autumn's numbered lines.
+
+Pairs each German line with its English source line in
+Autumn_cs_tagless/all_lines_numbered.txt and keeps the pairs in an
+index under .index/, rebuilt only when either file changes.
+
+A pair is only verified when the two lines share words: names, numbers
+and the English left in the code-switched German. Length ratio and
+direction tags alone pair any two lines of about the same size, so they
+only rank pairs that share enough words. Lines are paired by number
+first; what is left on both sides is then aligned in order, as happens
+when the numbering drifts. Same-number lines that share nothing and
+found no other counterpart are listed as "unverified", and when most
+same-number pairs are, the numbering is reported as drifted.
+
+Usage: align_lines.py [--de N ...] [--en N ...] [--export pairs.csv]
+"""
+
+import re
+import os
+import csv
+import sys
+import json
+import math
+import argparse
+import statistics
+
+from fun_lines import DIRECTION_TAG
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GERMAN_FILE = os.path.join(ROOT, "german_autumn_lines.txt")
+ENGLISH_FILE = os.path.join(ROOT, "Autumn_cs_tagless", "all_lines_numbered.txt")
+INDEX_FILE = os.path.join(ROOT, ".index", "alignment-german_autumn_lines.json")
+INDEX_VERSION = 2
+
+# "N text", "N  text" and the "N|text" lines of the later German batches
+NUMBERED = re.compile(r'(\d+)(?:\s+|\|)(.*)')
+# Words counted as shared text: four letters or more, outside direction tags
+WORD = re.compile(r'[^\W\d_]{4,}|\d+')
+# A pair is verified when it shares this many words and this share of the shorter line's words
+MIN_SHARED = 2
+MIN_SIMILARITY = 0.5
+# Verified pairs costing more than this are not the same line
+MAX_COST = 3.0
+# What leaving a line unpaired costs; two skips equal one pair at MAX_COST
+SKIP_COST = MAX_COST / 2
+# Spread of log length ratios assumed when there are too few pairs to measure it
+DEFAULT_SPREAD = 0.35
+
+
+def read_numbered(filepath):
+    """Return {line_num: text} of a numbered file; the first line of a number wins."""
+    lines = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = NUMBERED.match(line.rstrip('\n'))
+            if match:
+                lines.setdefault(int(match.group(1)), match.group(2))
+    return lines
+
+
+def features(text):
+    """Return (log length of the spoken text, number of direction tags, words) of a line."""
+    tags = DIRECTION_TAG.findall(text)
+    spoken = DIRECTION_TAG.sub('', text)
+    return math.log(len(spoken.strip()) + 1), len(tags), frozenset(WORD.findall(spoken.lower()))
+
+
+def shares_text(de, en):
+    """Return whether two lines share enough words to be the same line."""
+    shared = len(de[2] & en[2])
+    return shared >= MIN_SHARED and shared >= MIN_SIMILARITY * min(len(de[2]), len(en[2]))
+
+
+class PairCost:
+    """Cost of pairing a German and an English line, from length ratio and tags.
+
+    The usual German/English log length ratio and its spread are measured
+    on the number pairs that share text, so the cost adapts to how much
+    longer German runs. Lines that share no text cost None: they can't pair.
+    """
+
+    def __init__(self, german, english):
+        ratios = [german[num][0] - english[num][0] for num in german.keys() & english.keys()
+                  if shares_text(german[num], english[num])]
+        self.ratio = statistics.median(ratios) if ratios else 0.0
+        spread = statistics.median(abs(r - self.ratio) for r in ratios) * 1.4826 if len(ratios) > 2 else 0.0
+        self.spread = spread or DEFAULT_SPREAD
+
+    def __call__(self, de, en):
+        if not shares_text(de, en):
+            return None
+        pair_cost = abs(de[0] - en[0] - self.ratio) / self.spread + abs(de[1] - en[1]) / 2
+        return pair_cost if pair_cost <= MAX_COST else None
+
+
+def align_in_order(german, english, cost):
+    """Align two lists of (line_num, features) in order; return the (de, en, cost) pairs.
+
+    Classic edit distance: each step pairs the next two lines or skips one
+    of them at SKIP_COST. Only lines that share text can pair.
+    """
+    n, m = len(german), len(english)
+    # moves[i][j]: 0 pair, 1 skip German, 2 skip English
+    moves = [bytearray(m + 1) for _ in range(n + 1)]
+    previous = [j * SKIP_COST for j in range(m + 1)]
+    for j in range(1, m + 1):
+        moves[0][j] = 2
+    for i in range(1, n + 1):
+        row = [i * SKIP_COST] + [0.0] * m
+        moves[i][0] = 1
+        de = german[i - 1][1]
+        for j in range(1, m + 1):
+            pair_cost = cost(de, english[j - 1][1])
+            best, move = (math.inf, 1) if pair_cost is None else (previous[j - 1] + pair_cost, 0)
+            if previous[j] + SKIP_COST < best:
+                best, move = previous[j] + SKIP_COST, 1
+            if row[j - 1] + SKIP_COST < best:
+                best, move = row[j - 1] + SKIP_COST, 2
+            row[j] = best
+            moves[i][j] = move
+        previous = row
+
+    pairs = []
+    i, j = n, m
+    while i and j:
+        move = moves[i][j]
+        if move == 0:
+            pairs.append((german[i - 1][0], english[j - 1][0], cost(german[i - 1][1], english[j - 1][1])))
+            i, j = i - 1, j - 1
+        elif move == 1:
+            i -= 1
+        else:
+            j -= 1
+    pairs.reverse()
+    return pairs
+
+
+def build_alignment(german_file, english_file):
+    """Return the [de_num, en_num, method, cost] pairs of the two numbered files.
+
+    method is "number" or "fuzzy" for pairs that share text, and
+    "unverified" (cost None) for same-number lines that share none.
+    """
+    german = {num: features(text) for num, text in read_numbered(german_file).items()}
+    english = {num: features(text) for num, text in read_numbered(english_file).items()}
+    cost = PairCost(german, english)
+
+    pairs = []
+    for num in sorted(german.keys() & english.keys()):
+        pair_cost = cost(german[num], english[num])
+        if pair_cost is not None:
+            pairs.append([num, num, 'number', round(pair_cost, 3)])
+    paired_de = {de for de, _, _, _ in pairs}
+    paired_en = {en for _, en, _, _ in pairs}
+    leftover_de = [(num, german[num]) for num in sorted(german) if num not in paired_de]
+    leftover_en = [(num, english[num]) for num in sorted(english) if num not in paired_en]
+    for de, en, pair_cost in align_in_order(leftover_de, leftover_en, cost):
+        pairs.append([de, en, 'fuzzy', round(pair_cost, 3)])
+        paired_de.add(de)
+        paired_en.add(en)
+    pairs += [[num, num, 'unverified', None] for num in german.keys() & english.keys()
+              if num not in paired_de and num not in paired_en]
+    pairs.sort()
+    return pairs
+
+
+def file_stamp(filepath):
+    stat = os.stat(filepath)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Alignment:
+    """The persistent alignment of a German and an English numbered file."""
+
+    def __init__(self, german_file=GERMAN_FILE, english_file=ENGLISH_FILE, index_file=INDEX_FILE):
+        self.german_file = german_file
+        self.english_file = english_file
+        self.index_file = index_file
+        self.pairs = self.load()
+        # Counterpart lookups, one dict each way
+        self.to_english = {de: (en, method, pair_cost) for de, en, method, pair_cost in self.pairs}
+        self.to_german = {en: (de, method, pair_cost) for de, en, method, pair_cost in self.pairs}
+
+    def load(self):
+        """Return the pairs from index_file, rebuilding it if either source changed."""
+        stamps = [file_stamp(self.german_file), file_stamp(self.english_file)]
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index['version'] == INDEX_VERSION and index['stamps'] == stamps:
+                return index['pairs']
+        except (OSError, ValueError, KeyError):
+            pass
+        pairs = build_alignment(self.german_file, self.english_file)
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        tmp_path = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'stamps': stamps, 'pairs': pairs}, f)
+        os.replace(tmp_path, self.index_file)
+        return pairs
+
+    def export(self, path):
+        """Write every pair with both texts to a CSV file."""
+        german = read_numbered(self.german_file)
+        english = read_numbered(self.english_file)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["de_line", "en_line", "method", "cost", "german", "english"])
+            for de, en, method, pair_cost in self.pairs:
+                writer.writerow([de, en, method, pair_cost, german[de], english[en]])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Align german_autumn_lines.txt with Autumn's numbered lines.")
+    parser.add_argument('--german', default=GERMAN_FILE)
+    parser.add_argument('--english', default=ENGLISH_FILE)
+    parser.add_argument('--index', default=INDEX_FILE, help="where the alignment is kept")
+    parser.add_argument('--de', type=int, action='append', default=[], help="show the English line of German line N")
+    parser.add_argument('--en', type=int, action='append', default=[], help="show the German line of English line N")
+    parser.add_argument('--export', metavar='CSV', help="write all aligned pairs with their texts")
+    args = parser.parse_args(argv)
+
+    alignment = Alignment(args.german, args.english, args.index)
+    methods = [method for _, _, method, _ in alignment.pairs]
+    print(f"{len(methods)} pairs: {methods.count('number')} by number, {methods.count('fuzzy')} fuzzy, "
+          f"{methods.count('unverified')} unverified")
+    if methods.count('unverified') > methods.count('number'):
+        print(f"Warning: the numbering has drifted: {methods.count('unverified')} of "
+              f"{methods.count('number') + methods.count('unverified')} same-number lines share no text")
+    for num in args.de:
+        en, method, _ = alignment.to_english.get(num, ('-', 'unpaired', None))
+        print(f"de {num} -> en {en} ({method})")
+    for num in args.en:
+        de, method, _ = alignment.to_german.get(num, ('-', 'unpaired', None))
+        print(f"en {num} -> de {de} ({method})")
+    if args.export:
+        alignment.export(args.export)
+        print(f"Wrote {args.export}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+assign_roles.py - Assign scripts to actors against their category targets.
+
+Takes a pool of scripts (script_id, category, role, words) and a set of
+actors (actor, quota and optionally a target % per category) and writes
+role_assignments.csv with one script_id,category,role,actor row per
+assigned script, like Daniel/role_assignments.csv.
+
+Each actor needs quota * target % words of every category. Scripts are
+assigned per category, largest first, to the actor that still needs the
+most words of it, as long as they fit; actors still short get the
+leftover script closest to what they miss.
+A local search then moves scripts from the actor furthest over its
+target to the one furthest under it while that lowers their combined
+deviation. Both steps only touch heaps and sorted lists, so thousands of
+actors and hundreds of thousands of scripts take seconds.
+
+Actors without target columns use the targets of actor_stats.txt. The
+cs_tagless and cs_tagfull categories of older files (as in
+Daniel/role_assignments.csv) count as cs_alpha and cs_noalpha. Scripts
+whose category has no target for anyone are left unassigned, with a
+warning.
+
+Usage: assign_roles.py SCRIPTS_CSV --actors ACTORS_CSV [-o role_assignments.csv]
+"""
+
+import os
+import csv
+import sys
+import time
+import heapq
+import bisect
+import argparse
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fun_lines import CATEGORY_ALIASES, CATEGORY_TARGETS  # noqa: E402
+
+FIELDS = ["script_id", "category", "role", "actor"]
+MAX_MOVES = 1_000_000
+
+
+def read_scripts(path):
+    """Return the (script_id, category, role, words) scripts of a CSV file."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [(row['script_id'], row['category'], row.get('role') or '', int(row['words']))
+                for row in csv.DictReader(f)]
+
+
+def read_actors(path):
+    """Return {actor: {category: words needed}} from a CSV file.
+
+    Every column besides actor and quota is a category target in percent;
+    without any, the actor_stats.txt targets apply.
+    """
+    actors = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            quota = float(row.pop('quota'))
+            actor = row.pop('actor')
+            targets = {CATEGORY_ALIASES.get(category, category): float(target)
+                       for category, target in row.items() if target not in (None, '')}
+            actors[actor] = {category: quota * target / 100
+                             for category, target in (targets or CATEGORY_TARGETS).items()}
+    return actors
+
+
+def assign_greedy(scripts, needs):
+    """Assign scripts of one category, largest first, to the actor needing the most words.
+
+    needs maps actor -> words needed; scripts are (index, words). A script
+    only goes to an actor it doesn't take past its target; the actors still
+    short afterwards each get the leftover script closest to what they
+    miss, if that brings them closer. Returns {actor: [words, ...]} and
+    the owner of every script given out, as {index: actor}.
+    """
+    # Max-heap on remaining need
+    heap = [(-need, actor) for actor, need in needs.items() if need > 0]
+    heapq.heapify(heap)
+    assigned = defaultdict(list)
+    owners = {}
+    leftover = []
+    for index, words in sorted(scripts, key=lambda script: -script[1]):
+        # The script fits no one if it doesn't fit the neediest actor
+        if not heap or words > -heap[0][0]:
+            leftover.append((words, index))
+            continue
+        need, actor = heap[0]
+        assigned[actor].append(words)
+        owners[index] = actor
+        if need + words < 0:
+            heapq.heapreplace(heap, (need + words, actor))
+        else:
+            heapq.heappop(heap)
+    
+    leftover.reverse()
+    for need, actor in sorted(heap):
+        need = -need
+        k = bisect.bisect_left(leftover, (need,))
+        candidates = [c for c in (k - 1, k) if 0 <= c < len(leftover)]
+        if not candidates:
+            break
+        k = min(candidates, key=lambda c: abs(leftover[c][0] - need))
+        words, index = leftover[k]
+        if words < 2 * need:
+            del leftover[k]
+            assigned[actor].append(words)
+            owners[index] = actor
+    return assigned, owners
+
+
+def best_move(words, over, under):
+    """Return the words of the script to move from an actor over its target by
+    over to one under it by under that lowers their deviation most, or None.
+
+    words is the sorted list of the over actor's scripts.
+    """
+    # Moving w changes |over| + |under| the least when w is close to (over + under) / 2
+    ideal = (over + under) / 2
+    k = bisect.bisect_left(words, ideal)
+    best = None
+    for w in words[max(k - 1, 0):k + 1]:
+        gain = over + under - abs(over - w) - abs(under - w)
+        if gain > 1e-9 and (best is None or gain > best[0]):
+            best = (gain, w)
+    return best and best[1]
+
+
+def rebalance(assigned, needs, max_moves=MAX_MOVES):
+    """Move scripts of one category from the actor furthest over its target
+    to the one furthest under it until that no longer helps. Returns the moves
+    as (words, from_actor, to_actor).
+    """
+    words = {actor: sorted(assigned.get(actor, ())) for actor in needs}
+    deviation = {actor: sum(words[actor]) - need for actor, need in needs.items()}
+    over = [(-dev, actor) for actor, dev in deviation.items() if dev > 0]
+    under = [(dev, actor) for actor, dev in deviation.items() if dev < 0]
+    heapq.heapify(over)
+    heapq.heapify(under)
+    moves = []
+    while over and under and len(moves) < max_moves:
+        dev_over, giver = over[0]
+        dev_under, taker = under[0]
+        # Skip entries left stale by earlier moves
+        if -dev_over != deviation[giver]:
+            heapq.heappop(over)
+            continue
+        if dev_under != deviation[taker]:
+            heapq.heappop(under)
+            continue
+        w = best_move(words[giver], -dev_over, -dev_under)
+        if w is None:
+            break
+        heapq.heappop(over)
+        heapq.heappop(under)
+        del words[giver][bisect.bisect_left(words[giver], w)]
+        bisect.insort(words[taker], w)
+        deviation[giver] -= w
+        deviation[taker] += w
+        for actor in (giver, taker):
+            dev = deviation[actor]
+            if dev > 0:
+                heapq.heappush(over, (-dev, actor))
+            elif dev < 0:
+                heapq.heappush(under, (dev, actor))
+        moves.append((w, giver, taker))
+    return moves
+
+
+def solve(scripts, actors, max_moves=MAX_MOVES):
+    """Return {script index: actor} for scripts against the needs of actors."""
+    by_category = defaultdict(list)
+    for index, (_, category, _, words) in enumerate(scripts):
+        by_category[CATEGORY_ALIASES.get(category, category)].append((index, words))
+
+    owners = {}
+    for category, pool in by_category.items():
+        needs = {actor: categories[category] for actor, categories in actors.items() if category in categories}
+        if not needs:
+            print(f"Warning: no actor has a target for {category}, leaving its {len(pool)} scripts unassigned")
+            continue
+        assigned, category_owners = assign_greedy(pool, needs)
+        # Scripts of one size are interchangeable: apply the moves by size
+        by_words = defaultdict(list)
+        for index, actor in category_owners.items():
+            by_words[actor, scripts[index][3]].append(index)
+        for w, giver, taker in rebalance(assigned, needs, max_moves):
+            index = by_words[giver, w].pop()
+            by_words[taker, w].append(index)
+            category_owners[index] = taker
+        owners.update(category_owners)
+    return owners
+
+
+def deviation(scripts, actors, owners):
+    """Return the total words by which actors miss their category targets."""
+    totals = defaultdict(float)
+    for index, actor in owners.items():
+        category = scripts[index][1]
+        totals[actor, CATEGORY_ALIASES.get(category, category)] += scripts[index][3]
+    return sum(abs(totals[actor, category] - need)
+               for actor, categories in actors.items() for category, need in categories.items())
+
+
+def write_assignments(scripts, owners, path):
+    """Write role_assignments.csv rows for the assigned scripts, in pool order."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for index in sorted(owners):
+            script_id, category, role, _ = scripts[index]
+            writer.writerow([script_id, category, role, owners[index]])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign scripts to actors against their category targets.")
+    parser.add_argument('scripts', help="CSV with script_id, category, role and words columns")
+    parser.add_argument('--actors', required=True,
+                        help="CSV with actor and quota columns, plus optional target %% per category")
+    parser.add_argument('-o', '--output', default="role_assignments.csv")
+    parser.add_argument('--max-moves', type=int, default=MAX_MOVES,
+                        help=f"local search moves per category (default: {MAX_MOVES})")
+    args = parser.parse_args(argv)
+
+    scripts = read_scripts(args.scripts)
+    actors = read_actors(args.actors)
+    start = time.perf_counter()
+    owners = solve(scripts, actors, args.max_moves)
+    seconds = time.perf_counter() - start
+    write_assignments(scripts, owners, args.output)
+
+    need = sum(sum(categories.values()) for categories in actors.values())
+    print(f"Assigned {len(owners)} of {len(scripts)} scripts to {len(actors)} actors in {seconds:.2f}s")
+    print(f"Deviation from targets: {deviation(scripts, actors, owners):.0f} of {need:.0f} words")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+bench.py - Benchmark the parser on a synthetic actor_assignments corpus.
+
+Generates actor_assignments*.txt files that follow every layout found in
+the actor folders (ITEMS blocks with Character N: dialogue, CS
+ALPHANUMERIC full scripts, --- MONOLOGUE --- and === ITEM N - MONOLOGUE ===
+blocks, ITEM N - BASIC SCENARIO and the single-spaced combined files like
+Troy's actor_assignments_17_18_19.txt), then times each stage of
+process_files and reports throughput in lines/s and MB/s.
+
+Usage: bench.py [--lines 1000 100000 ...] [--files N] [--seed N] [--keep DIR]
+"""
+
+import os
+import io
+import sys
+import glob
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+from fun_lines import read_lines, parse_file, iter_entries, merge_entries, clean_text, process_files
+
+RULE = "=" * 60
+SCENARIO_RULE = "=" * 50
+
+WORDS = ("okay so I was just um thinking about the thing you said and honestly "
+         "it kind of makes sense now like I get it but also why would you do that "
+         "right before the meeting I mean seriously what were you").split()
+TAGS = ["[sigh]", "[laugh]", "[scoff]", "[muttering]", "[softer]", "[frustrated]", "[apologetically]"]
+CATEGORIES = ["EMPATHETIC PARTIAL", "CONVERSATION"]
+CS_CATEGORIES = ["CS ALPHANUMERIC", "CS NO-ALPHANUMERIC"]
+MONOLOGUES = ["MONOLOGUE", "MONOLOGUE SELFTALK"]
+
+
+def sentence(rng, low=6, high=30):
+    """Return a random line of speech with the odd direction tag."""
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words)), rng.choice(TAGS))
+    return ' '.join(words).capitalize() + rng.choice(['.', '?', '...', '—'])
+
+
+def script_id(rng):
+    return f"{rng.getrandbits(32):08x}"
+
+
+def dialogue_block(rng, num, count, full_script=False):
+    """ITEMS block: Character 1 lines alternating with numbered Character 2 lines."""
+    category = rng.choice(CS_CATEGORIES if full_script else CATEGORIES)
+    lines = [RULE, f"ITEMS {num}-{num + count - 1} - {category} ({count * 20} words)",
+             f"Script: {script_id(rng)}_script", RULE]
+    if full_script:
+        lines += ["You are playing a customer service agent.", "--- FULL SCRIPT ---"]
+    else:
+        lines.append("You are B; your role: Character 2")
+    for n in range(num, num + count):
+        prefix = " " if full_script else ""
+        text = sentence(rng)
+        if full_script and category == "CS ALPHANUMERIC":
+            text += f" That's {rng.randint(1000, 9999)} Maple Drive, order {script_id(rng).upper()}."
+        lines.append(f"{prefix}Character 1: {sentence(rng)}")
+        lines.append(f"{n} Character 2: {text}")
+    return lines, num + count
+
+
+def dash_monologue(rng, num, count):
+    """--- MONOLOGUE --- block (format 1)."""
+    lines = [f"--- {rng.choice(MONOLOGUES)} ---", "This must be read out in a single delivery as one file",
+             f"{num} SCENARIO: {sentence(rng, 4, 8)}", SCENARIO_RULE]
+    for _ in range(count):
+        lines += [rng.choice(TAGS), sentence(rng, 30, 60)]
+    return lines, num + 1
+
+
+def item_monologue(rng, num, count):
+    """=== ITEM N - MONOLOGUE === block with Source: (format 2)."""
+    lines = [RULE, f"ITEM {num} - {rng.choice(MONOLOGUES)} ({count * 45} words)",
+             f"Source: {script_id(rng)}", RULE,
+             "This must be read out in a single delivery as one file",
+             f"{num} SCENARIO: {sentence(rng, 4, 8)}", SCENARIO_RULE]
+    for _ in range(count):
+        lines += [rng.choice(TAGS), sentence(rng, 30, 60)]
+    return lines, num + 1
+
+
+def basic_scenario(rng, num, count):
+    """ITEM N - BASIC SCENARIO blocks with single-line content (format 3)."""
+    lines = []
+    for n in range(num, num + count):
+        lines += [RULE, f"ITEM {n} - BASIC SCENARIO (20 words)", RULE,
+                  f"{n} [{rng.choice(['Sad', 'Angry', 'Fast', 'Happy'])}] {sentence(rng, 10, 25)}"]
+    return lines, num + count
+
+
+LAYOUTS = [
+    lambda rng, num: dialogue_block(rng, num, 10),
+    lambda rng, num: dialogue_block(rng, num, 10, full_script=True),
+    lambda rng, num: dash_monologue(rng, num, 3),
+    lambda rng, num: item_monologue(rng, num, 3),
+    lambda rng, num: basic_scenario(rng, num, 10),
+]
+
+
+def generate_corpus(directory, total_lines, files=8, seed=0):
+    """Write about total_lines numbered lines of actor_assignments files to directory.
+
+    The first files are double-spaced and mix all block layouts; the last
+    one is a single-spaced combined file of plain dialogue.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    num = 1
+    per_file = max(1, total_lines // files)
+    for k in range(1, files + 1):
+        if k < files:
+            name = f"actor_assignments{k}.txt"
+            lines = [f"ACTOR LINE ASSIGNMENTS - {per_file} ITEMS (~{per_file * 20} words)", RULE]
+            stop = num + per_file
+            while num < stop:
+                block, num = rng.choice(LAYOUTS)(rng, num)
+                lines += block
+            text = '\n\n'.join(lines) + '\n'
+        else:
+            name = f"actor_assignments_{k}_{k + 1}_{k + 2}.txt"
+            lines = []
+            for n in range(num, max(num + 1, total_lines + 1)):
+                lines += [f"Character 1: {sentence(rng, 2, 8)}", f"{n} Character 2: {sentence(rng)}"]
+            text = '\n'.join(lines) + '\n'
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+    return sorted(glob.glob(os.path.join(directory, "actor_assignments*.txt")))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run_benchmark(input_files, out_dir):
+    """Time each stage over input_files; return a list of (stage, seconds, lines, bytes)."""
+    size = sum(os.path.getsize(filepath) for filepath in input_files)
+    results = []
+
+    seconds, lines = timed(lambda: sum(1 for filepath in input_files for _ in read_lines(filepath)))
+    results.append(("read_lines", seconds, lines, size))
+
+    seconds, entries = timed(lambda: [entry for filepath in input_files for entry in parse_file(filepath)])
+    results.append(("parse_file", seconds, len(entries), size))
+
+    seconds, merged = timed(lambda: list(merge_entries(iter_entries(input_files))))
+    results.append(("parse + merge_entries", seconds, len(merged), size))
+
+    texts = [text for _, text, _, _ in merged]
+    seconds, _ = timed(lambda: [clean_text(text) for text in texts])
+    results.append(("clean_text", seconds, len(texts), sum(len(text.encode('utf-8')) for text in texts)))
+
+    output_file, texts_file, plain_file = (os.path.join(out_dir, name) for name in
+                                           ("all_lines_numbered.txt", "all_texts.txt", "all_texts_plain.txt"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, _ = timed(lambda: process_files(input_files, output_file, None, texts_file, plain_file))
+    results.append(("process_files", seconds, len(merged), size))
+    return results
+
+
+def report(total_lines, results):
+    print(f"\n{total_lines:,} lines")
+    print(f"{'Stage':<22} | {'Seconds':>8} | {'Lines/s':>12} | {'MB/s':>8}")
+    print(f"{'-' * 23}+{'-' * 10}+{'-' * 14}+{'-' * 9}")
+    for stage, seconds, lines, size in results:
+        seconds = max(seconds, 1e-9)
+        print(f"{stage:<22} | {seconds:>8.3f} | {lines / seconds:>12,.0f} | {size / seconds / 1e6:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the parser on a synthetic corpus.")
+    parser.add_argument('--lines', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="corpus sizes in numbered lines (default: 1000 10000 100000)")
+    parser.add_argument('--files', type=int, default=8, help="files per corpus (default: 8)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', metavar='DIR', help="write the corpora under DIR and keep them")
+    args = parser.parse_args(argv)
+
+    for total_lines in args.lines:
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus_dir = os.path.join(args.keep or tmp, f"corpus_{total_lines}")
+            input_files = generate_corpus(corpus_dir, total_lines, args.files, args.seed)
+            report(total_lines, run_benchmark(input_files, tmp))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
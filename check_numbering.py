@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+check_numbering.py - Check the line numbering of actor folders.
+
+fun_lines.py keeps the first text of a line number that occurs more than
+once and drops the others without a word. This reports, per actor folder:
+
+- collisions: line numbers found more than once with different texts,
+  with the text that was kept and the ones that were dropped;
+- gaps: numbers missing between the lowest and highest line;
+- overlaps: assignment files whose number ranges overlap (what
+  renumber.py offsets exist to fix);
+- descents: places where the numbers of a file go backwards;
+- header mismatches: ITEMS N-M and ITEM N headers followed by another
+  number of entries than the M-N+1 they announce, counted up to the next
+  category header. Consecutive headers of one category are counted
+  together, as some files put all the lines of such a run under its
+  first header.
+
+Header numbers count items, not lines: "ITEMS 1-10" may well hold lines
+101-110. Where the lines of a header are numbered from elsewhere, that
+is listed under number drift (how far off, and for how many headers),
+which is not a problem by itself.
+
+Each file is read once: its entries and its ITEM headers come from the
+same segments. The report is JSON; the exit status is 1 if any folder has
+problems.
+
+Usage: check_numbering.py [DIR|GLOB ...] [--json report.json]
+"""
+
+import re
+import os
+import sys
+import json
+import argparse
+
+from fun_lines import clean_text, category_headers, file_segments, parse_segment, actor_files, find_actor_dirs
+from fun_lines_cli import expand_dirs
+
+REPORT_VERSION = 2
+# "ITEMS 62-71 - CONVERSATION (...)" and "ITEM 81 - BASIC SCENARIO (...)" headers
+ITEM_HEADER = re.compile(r'^[ \t]*ITEMS?[ \t]+(\d+)(?:[ \t]*-[ \t]*(\d+))?[ \t]*-', re.MULTILINE)
+# Problem lists of a folder report, counted in its summary
+PROBLEMS = ('collisions', 'gaps', 'overlaps', 'descents', 'header_mismatches')
+
+
+def gap_ranges(numbers):
+    """Return the [first, last] runs of numbers missing between the lowest and highest of sorted numbers."""
+    gaps = []
+    for num, following in zip(numbers, numbers[1:]):
+        if following > num + 1:
+            gaps.append([num + 1, following - 1])
+    return gaps
+
+
+def item_headers(content):
+    """Return the (offset, header, first, last) of every ITEM/ITEMS header of content."""
+    headers = []
+    for match in ITEM_HEADER.finditer(content):
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) else first
+        line_end = content.find('\n', match.start())
+        headers.append((match.start(), content[match.start():line_end if line_end != -1 else None].strip(),
+                        first, last))
+    return headers
+
+
+class HeaderSpan:
+    """The entries counted under one ITEM/ITEMS header."""
+    __slots__ = ('header', 'category', 'first', 'last', 'count', 'low')
+
+    def __init__(self, header, category, first, last):
+        self.header, self.category, self.first, self.last = header, category, first, last
+        self.count = 0
+        self.low = None
+
+    def add(self, line_num):
+        self.count += 1
+        self.low = line_num if self.low is None else min(self.low, line_num)
+
+
+def check_actor(files):
+    """Return the numbering report of one actor's assignment files."""
+    names = [os.path.basename(filepath) for filepath in files]
+    # line number -> (file index, cleaned text) of the entry fun_lines.py keeps
+    kept = {}
+    dropped = {}
+    repeats = 0
+    file_numbers = [set() for _ in files]
+    header_spans = [[] for _ in files]
+    descents = []
+    previous = {}
+    for file_index, filepath in enumerate(files):
+        if not os.path.exists(filepath):
+            print(f"Warning: {filepath} not found, skipping")
+            continue
+        span = None
+        # Segments are cut at line boundaries, so no header spans two of them;
+        # the entries of a header may, so the open span carries over
+        for segment in file_segments(filepath):
+            entries, offsets, _ = parse_segment(segment)
+            categories = dict(category_headers(segment)[1:])
+            items = {offset: HeaderSpan(header, categories.get(offset), first, last)
+                     for offset, header, first, last in item_headers(segment)}
+            bounds = sorted(set(categories) | set(items))
+            located = sorted(zip(offsets, (entry[1] for entry in entries)))
+            k = 0
+            for bound in bounds + [None]:
+                # The entries above the next header (or the end) belong to the open span
+                while k < len(located) and (bound is None or located[k][0] < bound):
+                    if span is not None:
+                        span.add(located[k][1])
+                    k += 1
+                if bound is not None:
+                    span = items.get(bound)
+                    if span is not None:
+                        header_spans[file_index].append(span)
+
+            for kind, line_num, text, _, _ in entries:
+                file_numbers[file_index].add(line_num)
+                # Blocks come before the numbered lines of a segment, each kind in file order
+                order = (file_index, kind)
+                if line_num < previous.get(order, line_num):
+                    descents.append({'file': names[file_index], 'line': line_num, 'after': previous[order]})
+                previous[order] = line_num
+
+                text = clean_text(text)
+                if line_num not in kept:
+                    kept[line_num] = (file_index, text)
+                elif kept[line_num][1] == text:
+                    repeats += 1
+                else:
+                    dropped.setdefault(line_num, []).append({'file': names[file_index], 'text': text})
+
+    gaps = gap_ranges(sorted(kept))
+
+    collisions = [{'line': line_num, 'kept': {'file': names[kept[line_num][0]], 'text': kept[line_num][1]},
+                   'dropped': others}
+                  for line_num, others in sorted(dropped.items())]
+
+    spans = sorted((min(nums), max(nums), i) for i, nums in enumerate(file_numbers) if nums)
+    overlaps = []
+    for k, (first, last, i) in enumerate(spans):
+        for other_first, other_last, j in spans[k + 1:]:
+            if other_first > last:
+                break
+            overlaps.append({'files': [names[i], names[j]], 'lines': [other_first, min(last, other_last)]})
+
+    header_mismatches = []
+    number_drift = []
+    for i, file_spans in enumerate(header_spans):
+        drift = {}
+        # Consecutive headers of one category are counted together: some
+        # files put all the lines of a run under its first header
+        for k, span in enumerate(file_spans):
+            if k == 0 or span.category != file_spans[k - 1].category:
+                run = []
+            run.append(span)
+            if k + 1 < len(file_spans) and file_spans[k + 1].category == span.category:
+                continue
+            expected = sum(member.last - member.first + 1 for member in run)
+            found = sum(member.count for member in run)
+            lows = [member.low for member in run if member.low is not None]
+            if found != expected:
+                header_mismatches.append({'file': names[i], 'headers': [member.header for member in run],
+                                          'expected': expected, 'found': found})
+            elif min(lows) != run[0].first:
+                offset = min(lows) - run[0].first
+                drift[offset] = drift.get(offset, 0) + len(run)
+        number_drift.extend({'file': names[i], 'offset': offset, 'headers': count}
+                            for offset, count in sorted(drift.items()))
+
+    report = {
+        'files': [{'file': names[i], 'lines': len(nums), 'first': min(nums, default=None),
+                   'last': max(nums, default=None)} for i, nums in enumerate(file_numbers)],
+        'lines': len(kept),
+        'repeats': repeats,
+        'collisions': collisions,
+        'gaps': gaps,
+        'overlaps': overlaps,
+        'descents': descents,
+        'header_mismatches': header_mismatches,
+        'number_drift': number_drift,
+    }
+    report['problems'] = sum(len(report[name]) for name in PROBLEMS)
+    return report
+
+
+def check_dirs(actors):
+    """Return the report of actors, a mapping of actor folder -> assignment files."""
+    reports = {actor_dir: check_actor(files) for actor_dir, files in actors.items()}
+    return {'version': REPORT_VERSION, 'problems': sum(report['problems'] for report in reports.values()),
+            'actors': reports}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the line numbering of actor folders.")
+    parser.add_argument('dirs', nargs='*', metavar='DIR',
+                        help="actor folders or glob patterns (default: every actor folder under the current one)")
+    parser.add_argument('--json', metavar='PATH', help="write the full report as JSON ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    actors = actor_files(expand_dirs(args.dirs)) if args.dirs else find_actor_dirs(os.getcwd())
+    if not actors:
+        parser.error("no actor_assignments*.txt files found")
+    report = check_dirs(actors)
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for actor_dir, actor in report['actors'].items():
+            counts = ', '.join(f"{len(actor[name])} {name.replace('_', ' ')}" for name in PROBLEMS)
+            print(f"{actor_dir}: {actor['lines']} lines, {counts}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Wrote {args.json}")
+    sys.exit(1 if report['problems'] else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,1274 @@
+#!/usr/bin/env python3
+"""
+fun_lines.py - Process actor assignment files into numbered lines.
+
+Reads all actor_assignments*.txt files of an actor folder and outputs
+a single file with numbered lines, removing role prefixes and metadata
+while keeping direction tags like [apologetically].
+
+Handles three formats:
+1. MONOLOGUE (dash style): --- MONOLOGUE --- with multi-line content
+2. MONOLOGUE (equals style): === ITEM N - MONOLOGUE === with multi-line content  
+3. BASIC SCENARIO: === ITEM N - BASIC SCENARIO === with single-line content
+
+Run directly to rebuild every actor folder under the repo root (or the
+directory given as the first argument) in parallel.
+"""
+
+import re
+import os
+import csv
+import sys
+import glob
+import json
+import mmap
+import bisect
+import heapq
+import shutil
+import hashlib
+import time
+import cProfile
+import tempfile
+from array import array
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+OUTPUT_NAME = "all_lines_numbered.txt"
+TEXTS_NAME = "all_texts.txt"
+PLAIN_NAME = "all_texts_plain.txt"
+STATS_NAME = "actor_stats.txt"
+TAGS_NAME = "all_tags.tsv"
+TAG_INDEX_NAME = "all_tags_index.json"
+SCRIPT_INDEX_NAME = "all_scripts_index.json"
+# Language recorded for the direction tags of the actor folders
+DEFAULT_LANGUAGE = "en"
+WRITE_BUFFER = 1024 * 1024
+
+# Parsed entries are cached per file content under CACHE_DIR. Bump
+# PARSER_VERSION whenever a parser change can change the entries of a file.
+PARSER_VERSION = 6
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Files larger than SEGMENT_SIZE characters are parsed a segment at a time, and
+# at most RUN_SIZE entries are kept in memory before they are spilled to disk.
+SEGMENT_SIZE = 8 * 1024 * 1024
+RUN_SIZE = 1_000_000
+
+# Per-stage timings, only collected while process_files writes a report:
+# stage -> [seconds, characters, calls]. Time is charged to one stage at a
+# time (the innermost one), so nested stages are never counted twice.
+STAGES = ['read', 'segment', 'cache', 'sniff', 'monologue1', 'monologue2', 'scenario', 'remove_blocks',
+          'strip_metadata', 'numbered_lines', 'merge', 'clean_text', 'write']
+STAGE_TIMES = None
+active_stage = ['write', 0.0]
+
+
+def switch_stage(name):
+    """Charge the time since the last switch to the active stage and make name active.
+
+    Returns the previously active stage.
+    """
+    now = time.perf_counter()
+    previous, since = active_stage
+    STAGE_TIMES.setdefault(previous, [0.0, 0, 0])[0] += now - since
+    active_stage[:] = [name, now]
+    return previous
+
+
+def count_stage(name, size):
+    """Add one call over size characters to a stage."""
+    totals = STAGE_TIMES.setdefault(name, [0.0, 0, 0])
+    totals[1] += size
+    totals[2] += 1
+
+
+@contextmanager
+def stage(name, size=0):
+    """Charge the time spent in the with block to a stage, if timings are collected."""
+    if STAGE_TIMES is None:
+        yield
+        return
+    previous = switch_stage(name)
+    count_stage(name, size)
+    try:
+        yield
+    finally:
+        switch_stage(previous)
+
+
+def timed_iter(name, iterable, size=len):
+    """Yield the items of iterable, charging the time spent producing each one to a stage.
+
+    size(item) is the number of characters an item counts for in the stage.
+    """
+    iterator = iter(iterable)
+    while True:
+        previous = switch_stage(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            switch_stage(previous)
+        count_stage(name, size(item))
+        yield item
+
+
+# clean_text patterns. All role label patterns need a ':' to match.
+# "Character N:" style labels (anywhere in text)
+CHARACTER_LABEL = re.compile(r'Character\s*\d+:\s*')
+# "Role Name: D#:" or "Role Name: A#:" style (e.g., "Customer Support: D2:")
+ROLE_LABEL = re.compile(r'[A-Z][A-Za-z\s]+:\s*[A-Z]?\d+:\s*')
+# Simple role names at start of text only (e.g., "Narrator:")
+LEADING_ROLE = re.compile(r'^[A-Z][A-Za-z\s]+:\s*')
+# Text is truncated at the first appearance of any metadata marker
+METADATA_MARKER = re.compile('|'.join(re.escape(marker) for marker in [
+    'ITEMS ',
+    'ITEM ',
+    'You are B;',
+    'You are A;',
+    'You are Character',
+    'You are playing a customer service agent',
+]))
+# Leftover section markers
+SECTION_MARKER = re.compile(r'={5,}|-{5,}')
+
+
+def clean_text(text):
+    """Remove all metadata, role prefixes, and instructions while keeping direction tags intact."""
+    if ':' in text:
+        text = CHARACTER_LABEL.sub('', text)
+        text = ROLE_LABEL.sub('', text)
+        text = LEADING_ROLE.sub('', text)
+    
+    marker = METADATA_MARKER.search(text)
+    if marker:
+        text = text[:marker.start()]
+    
+    if '=====' in text or '-----' in text:
+        text = SECTION_MARKER.sub(' ', text)
+    
+    # Clean up extra whitespace
+    return ' '.join(text.split())
+
+
+# Direction tags kept by clean_text: [apologetically], [frustrated laugh], [Stöhnt]
+DIRECTION_TAG = re.compile(r'\[([^\[\]\n]+)\]')
+TAG_FIELDS = ["line", "tag", "offset", "normalized", "language"]
+
+
+def direction_tags(text):
+    """Yield (offset, tag, normalized) for every direction tag of cleaned text.
+
+    offset is where the '[' is in text, tag the text between the brackets
+    and normalized the same in lowercase with single spaces.
+    """
+    if '[' not in text:
+        return
+    for match in DIRECTION_TAG.finditer(text):
+        tag = match.group(1)
+        normalized = ' '.join(tag.split()).casefold()
+        if normalized:
+            yield match.start(), tag, normalized
+
+
+# Block headers. Only the header is matched with a regex; the body of a block
+# runs up to the first terminator found by the *_END patterns below.
+#
+# FORMAT 1: --- MONOLOGUE ---
+# --- MONOLOGUE... ---
+# This must be read out in a single delivery as one file (optional)
+# NUMBER SCENARIO: description
+# ==================================================
+# [multi-line content]
+MONOLOGUE1_HEADER = re.compile(r'---\s*MONOLOGUE[^\n]*---\s*\n(?:\s*[^\d\n][^\n]*\n)?\s*(\d+)\s+SCENARIO:[^\n]*\n=+\n')
+MONOLOGUE1_END = re.compile(r'\n---|\n\n\d+\s')
+# What a format 1 header needs right after the blank lines below its first
+# line, or right after the one line that follows them (see monologue1_possible)
+MONOLOGUE1_SCENARIO = re.compile(r'\s*\d+\s+SCENARIO:[^\n]*\n=+\n')
+WHITESPACE = re.compile(r'\s*')
+
+# FORMAT 2: === ITEM N - MONOLOGUE ===
+# ============================================================
+# ITEM 481 - MONOLOGUE SELFTALK (202 words)
+# Source: 00348d6d
+# ============================================================
+# This must be read out in a single delivery as one file
+# 481 SCENARIO: description
+# ==================================================
+# [multi-line content]
+MONOLOGUE2_HEADER = re.compile(r'={10,}\nITEM\s+(\d+)\s*-\s*MONOLOGUE[^\n]*\nSource:[^\n]*\n={10,}\n')
+MONOLOGUE2_SCENARIO = re.compile(r'\d+\s+SCENARIO:[^\n]*\n=+\n')
+MONOLOGUE2_END = re.compile(r'\n+={10,}\nITEM|\n---')
+
+# FORMAT 3: Standalone NUM SCENARIO: (fallback for any missed monologues)
+SCENARIO_HEADER = re.compile(r'(?<!\n)(\d+)\s+SCENARIO:[^\n]*\n=+\n')
+SCENARIO_END = re.compile(r'\n---|\n\n\d+\s|\n={10,}\nITEM')
+# The line below a SCENARIO: line of any format
+SCENARIO_RULE = re.compile(r'\n=+\n')
+
+# Header/metadata lines, checked against the line with leading whitespace
+# stripped. Each rule is (match, replacement); the first rule that matches
+# replaces the whole line, '###BREAK###' marks where a numbered line must stop.
+# The order matters: it is the order the header lines used to be removed in.
+BREAK = '###BREAK###'
+NUMBERED_LINE = re.compile(r'(\d+)\s+(.*)')
+NUMBERED_START = re.compile(r'\d+\s+')
+LINE_RULES = [
+    # Lines made of '=' only
+    (lambda s: s.rstrip() and not s.rstrip().strip('='), ''),
+    (re.compile(r'\d+\s+SCENARIO:').match, ''),
+    (lambda s: s.startswith('Script:'), ''),
+    # Character N: lines (other character's dialogue)
+    (re.compile(r'Character\s*\d+:').match, BREAK),
+    # ITEM/ITEMS headers
+    (re.compile(r'ITEM\s+\d+').match, BREAK),
+    (re.compile(r'ITEMS\s+\d+-\d+').match, BREAK),
+    (lambda s: s.startswith('Source:'), ''),
+    (lambda s: s.startswith('This must be read'), ''),
+    # Instruction lines
+    (lambda s: s.startswith('You are playing'), BREAK),
+    (re.compile(r'You are [A-Z];').match, BREAK),
+    (lambda s: s.startswith('You are Character'), BREAK),
+]
+# What a line must contain for each rule of LINE_RULES (and SPLIT_RULES) to match
+RULE_NEEDLES = ['=', 'SCENARIO:', 'Script:', 'Character', 'ITEM', 'ITEMS', 'Source:',
+                'This must be read', 'You are playing', 'You are ', 'You are Character']
+
+# A few headers may have their whitespace run across a line break
+# (e.g. "ITEM" on its own line followed by "481 - ..."). These map the rule
+# index to (head, tail): the head line and the next non-blank line.
+SPLIT_RULES = {
+    1: (re.compile(r'\d+\s*$').match, re.compile(r'\s*SCENARIO:').match),
+    3: (re.compile(r'Character\s*$').match, re.compile(r'\s*\d+:').match),
+    4: (re.compile(r'ITEM\s*$').match, re.compile(r'\s*\d').match),
+    5: (re.compile(r'ITEMS\s*$').match, re.compile(r'\s*\d+-\d+').match),
+}
+
+
+def monologue1_starts(content):
+    """Yield positions of '---' directly before a MONOLOGUE (format 1)."""
+    idx = content.find('MONOLOGUE')
+    while idx != -1:
+        start = idx
+        while start and content[start - 1].isspace():
+            start -= 1
+        if start >= 3 and content.startswith('---', start - 3):
+            yield start - 3
+        idx = content.find('MONOLOGUE', idx + 1)
+
+
+def monologue1_possible(content, start):
+    """Return whether MONOLOGUE1_HEADER can match at start, without running it.
+
+    When the header fails, the regex retries every split of the blank lines
+    below the '--- MONOLOGUE ---' line, which takes quadratic time on long
+    runs of them. This check follows the same rules in one pass: the last
+    '---' of the line must end it, and after the blank lines comes either
+    "N SCENARIO:" or one more line (only if it can't start with N) and then
+    "N SCENARIO:".
+    """
+    mono = WHITESPACE.match(content, start + 3).end()
+    if not content.startswith('MONOLOGUE', mono):
+        return False
+    line_end = content.find('\n', mono)
+    dash = content.rfind('---', mono + 9, line_end)
+    if line_end == -1 or dash == -1:
+        return False
+    pos = WHITESPACE.match(content, dash + 3).end()
+    if pos <= line_end or pos == len(content):
+        return False
+    if content[pos].isdecimal() and MONOLOGUE1_SCENARIO.match(content, pos):
+        return True
+    # The optional line must start with a character that is neither a digit
+    # nor a line break, possibly a space in front of the number
+    if content[pos].isdecimal() and pos == content.rfind('\n', line_end, pos) + 1:
+        return False
+    next_line = content.find('\n', pos)
+    return next_line != -1 and MONOLOGUE1_SCENARIO.match(content, next_line + 1) is not None
+
+
+def monologue2_starts(content):
+    """Yield positions of '=' runs directly above an ITEM line (format 2)."""
+    idx = content.find('=\nITEM')
+    while idx != -1:
+        start = idx + 1
+        while start and content[start - 1] == '=':
+            start -= 1
+        yield start
+        idx = content.find('=\nITEM', idx + 1)
+
+
+def scenario_starts(content):
+    """Yield positions of the number in front of each SCENARIO: (format 3).
+
+    Only a SCENARIO: line followed by a line of '=' can hold a header. That
+    is checked once per line: running the header on every SCENARIO: of a
+    long line would scan the rest of the line each time.
+    """
+    idx = content.find('SCENARIO:')
+    line_end = -1
+    while idx != -1:
+        if idx > line_end:
+            line_end = content.find('\n', idx)
+            if line_end == -1:
+                return
+            if not SCENARIO_RULE.match(content, line_end):
+                idx = content.find('SCENARIO:', line_end)
+                continue
+        stop = idx
+        while stop and content[stop - 1].isspace():
+            stop -= 1
+        start = stop
+        while start and content[start - 1].isdecimal():
+            start -= 1
+        if start < stop < idx:
+            # A number at the very start of a line only matches from its second digit
+            yield start
+            if start + 1 < stop:
+                yield start + 1
+        idx = content.find('SCENARIO:', idx + 1)
+
+
+MONOLOGUE1 = (monologue1_starts, monologue1_possible, MONOLOGUE1_HEADER, MONOLOGUE1_END, None)
+MONOLOGUE2 = (monologue2_starts, None, MONOLOGUE2_HEADER, MONOLOGUE2_END, MONOLOGUE2_SCENARIO)
+SCENARIO = (scenario_starts, None, SCENARIO_HEADER, SCENARIO_END, None)
+
+# Format sniffing: a block format can only match content holding all of its
+# needles, so one substring search per needle decides which formats a file
+# is scanned for; dialogue-only files skip the block passes altogether.
+# The needles have no line breaks, so removing blocks never creates one.
+MONOLOGUE1_NEEDLES = {'MONOLOGUE', 'SCENARIO:'}
+MONOLOGUE2_NEEDLES = {'ITEM', 'MONOLOGUE', 'Source:', 'SCENARIO:'}
+SCENARIO_NEEDLES = {'SCENARIO:'}
+# Category headers are ITEM/ITEMS lines or "--- SECTION ---" lines
+CATEGORY_NEEDLES = ('ITEM', '---')
+FORMAT_NEEDLES = MONOLOGUE1_NEEDLES | MONOLOGUE2_NEEDLES | SCENARIO_NEEDLES | set(CATEGORY_NEEDLES)
+
+
+def sniff(content):
+    """Return the FORMAT_NEEDLES that occur in content."""
+    return {needle for needle in FORMAT_NEEDLES if needle in content}
+
+
+def find_blocks(content, block_format):
+    """Find monologue/scenario blocks as (start, end, line_num, body).
+
+    Blocks never overlap; a block ends right before the first match of the
+    format's end pattern after its header, or at the end of the content.
+    Every search moves forward through the content, so this takes linear time
+    even when terminators or anchors are missing.
+    """
+    starts, possible, header, end, anchor = block_format
+    blocks = []
+    pos = 0
+    # Last anchor search: where it started and what it found. The first
+    # anchor at or after a later position is the same one as long as that
+    # position doesn't pass it, and there is none at all if there was none
+    anchor_from = None
+    scenario = None
+    for start in starts(content):
+        if start < pos:
+            continue
+        if possible is not None and not possible(content, start):
+            continue
+        match = header.match(content, start)
+        if not match:
+            continue
+        body_start = match.end()
+        if anchor is not None:
+            if (anchor_from is None or body_start < anchor_from
+                    or (scenario is not None and body_start > scenario.start())):
+                anchor_from = body_start
+                scenario = anchor.search(content, body_start)
+            if not scenario:
+                continue
+            body_start = scenario.end()
+        stop = end.search(content, body_start)
+        pos = stop.start() if stop else len(content)
+        blocks.append((start, pos, int(match.group(1)), content[body_start:pos]))
+    return blocks
+
+
+def remove_blocks(content, blocks):
+    """Replace each block with a newline, like re.sub(pattern, '\n', content)."""
+    if not blocks:
+        return content
+    parts = []
+    pos = 0
+    for start, stop, _, _ in blocks:
+        parts.append(content[pos:start])
+        parts.append('\n')
+        pos = stop
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+
+def strip_sections(line):
+    """Remove a "--- SECTION ---" marker from anywhere in the line."""
+    first = line.find('---')
+    if first != -1:
+        last = line.rfind('---')
+        if last >= first + 3:
+            return line[:first] + line[last + 3:]
+    return line
+
+
+def strip_metadata(lines):
+    """Strip section markers and replace header/metadata lines in place.
+
+    Only the rules whose needle occurs in the lines are tried.
+    """
+    for i, line in enumerate(lines):
+        if '---' in line:
+            lines[i] = strip_sections(line)
+    text = '\n'.join(lines)
+    line_rules = [(r, matches) for r, (matches, _) in enumerate(LINE_RULES) if RULE_NEEDLES[r] in text]
+    split_rules = [(r, rule) for r, rule in SPLIT_RULES.items() if RULE_NEEDLES[r] in text]
+    split_heads = [head for _, (head, _) in split_rules]
+
+    rules = [None] * len(lines)
+    heads = []
+    for i, line in enumerate(lines):
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+        for r, matches in line_rules:
+            if matches(stripped):
+                rules[i] = r
+                break
+        else:
+            if any(head(stripped) for head in split_heads):
+                heads.append(i)
+
+    # Resolve headers split over several lines, in rule order
+    for r, (head, tail) in split_rules:
+        for i in heads:
+            if not head(lines[i].lstrip()) or (rules[i] is not None and rules[i] < r):
+                continue
+            j = i + 1
+            while j < len(lines) and (not lines[j].strip() or (
+                    rules[j] is not None and rules[j] < r and not LINE_RULES[rules[j]][1])):
+                j += 1
+            if j < len(lines) and (rules[j] is None or rules[j] >= r) and tail(lines[j]):
+                for k in range(i, j + 1):
+                    if rules[k] is None or rules[k] > r:
+                        rules[k] = r
+
+    for i, r in enumerate(rules):
+        if r is not None:
+            lines[i] = LINE_RULES[r][1]
+    return lines
+
+
+def numbered_lines(lines):
+    """Yield (index, line_num, text) for every numbered line and its continuation lines."""
+    i = 0
+    while i < len(lines):
+        num_match = NUMBERED_LINE.fullmatch(lines[i])
+        start = i
+        i += 1
+        if not num_match:
+            continue
+        text_parts = [num_match.group(2)]
+
+        # Gather continuation lines
+        while i < len(lines):
+            next_line = lines[i]
+            next_stripped = next_line.strip()
+
+            # Stop at break markers and empty lines (section break or removed content)
+            if next_stripped == BREAK or not next_stripped:
+                i += 1
+                break
+
+            # Stop at new numbered line or section markers
+            if (NUMBERED_START.match(next_line) or
+                next_line.startswith('---') or
+                next_stripped.startswith(('===', 'ITEM ', 'ITEMS ', 'Source:', 'Script:',
+                                          'Character ', 'This must be read', 'You are'))):
+                break
+
+            text_parts.append(next_stripped)
+            i += 1
+
+        full_text = ' '.join(text_parts)
+        if full_text.strip():
+            yield start, int(num_match.group(1)), full_text
+
+
+SCENARIO_LINE = re.compile(r'\d\s+SCENARIO:')
+CHARACTER_LINE = re.compile(r'Character\s*\d+:')
+
+
+def is_separator(line):
+    """Return whether the line is made of '=' only, ignoring surrounding whitespace."""
+    line = line.strip()
+    return bool(line) and not line.strip('=')
+
+
+def read_lines(filepath):
+    """Yield the lines of a file with '\r\n' and '\r' line endings turned into '\n'.
+
+    The file is memory-mapped and scanned in place; only one line at a time
+    is copied out and decoded.
+    """
+    with open(filepath, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            pos = 0
+            lf = data.find(b'\n')
+            cr = data.find(b'\r')
+            while pos < size:
+                if -1 < lf < pos:
+                    lf = data.find(b'\n', pos)
+                if -1 < cr < pos:
+                    cr = data.find(b'\r', pos)
+                end = min(lf if lf != -1 else size, cr if cr != -1 else size)
+                if end == size:
+                    yield data[pos:].decode('utf-8')
+                    return
+                yield data[pos:end].decode('utf-8') + '\n'
+                pos = end + 2 if data[end:end + 2] == b'\r\n' else end + 1
+
+
+def read_content(filepath):
+    """Return the content of a file with '\r\n' and '\r' line endings turned into '\n'.
+
+    The whole file is decoded in one call, which is what files parsed whole
+    need; read_lines streams the larger ones.
+    """
+    with stage('read'):
+        with open(filepath, 'rb') as f:
+            content = f.read().decode('utf-8')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        # The size is only known once the file is read
+        if STAGE_TIMES is not None:
+            STAGE_TIMES['read'][1] += len(content)
+    return content
+
+
+def read_segments(filepath, segment_size=SEGMENT_SIZE):
+    """Yield the content of a file in segments that parse exactly like the whole file.
+    
+    Lines come from read_lines, so line endings are normalized. Once a segment holds at least
+    segment_size characters, it is cut right before the next '--- SECTION ---'
+    line that nothing can run across: no block or SCENARIO header since the
+    previous '---' line, no ITEM header still looking for its SCENARIO, and no
+    header split over the cut. Dialogue without sections is cut the same way
+    before a blank line or a "Character N:" line, both of which end a
+    numbered line. Files smaller than segment_size are never cut.
+    """
+    lines = []
+    size = 0
+    prev = prev2 = ''
+    region_clean = True    # no block header since the last '---' line
+    region_solid = False   # last non-blank line since the last '---' line is not a split head
+    item_pending = False   # format 2 header that may still be looking for its SCENARIO
+    item_line = 0
+    item_monologue = False
+    
+    lines_in = read_lines(filepath)
+    if STAGE_TIMES is not None:
+        lines_in = timed_iter('read', lines_in)
+    for i, line in enumerate(lines_in):
+        text = line.rstrip('\n')
+        if text.startswith('---'):
+            # The line itself must not start a block, or what is left of
+            # it could run into the line above
+            section = strip_sections(text)
+            cut = ((section.startswith('---') or not section.strip())
+                   and 'MONOLOGUE' not in text and 'SCENARIO:' not in text
+                   and not text.rstrip()[-1:].isdecimal())
+        else:
+            # A SCENARIO: or MONOLOGUE header below a blank line reaches back
+            # over it to a number or '---' ending the line above
+            above = prev.rstrip()
+            cut = ((not text.strip() or (CHARACTER_LINE.match(text)
+                                         and 'MONOLOGUE' not in text and 'SCENARIO:' not in text))
+                   and above and not above[-1].isdecimal() and not above.endswith('-'))
+        if (cut and size >= segment_size and region_clean and region_solid and not item_pending
+                and not is_separator(prev)):
+            yield ''.join(lines)[:-1]
+            lines = []
+            size = 0
+        if text.startswith('---'):
+            # A block body may start right at this line if a header ends above it
+            region_clean = not is_separator(prev)
+            region_solid = False
+        if 'MONOLOGUE' in text or 'SCENARIO:' in text:
+            region_clean = False
+        
+        stripped = strip_sections(text).lstrip()
+        if stripped and not any(matches(stripped) for matches, repl in LINE_RULES if not repl):
+            region_solid = not any(head(stripped) for head, _ in SPLIT_RULES.values())
+        
+        if text.startswith('ITEM') and prev.endswith('='):
+            if not item_pending:
+                item_monologue = False
+            item_pending = True
+            item_line = i
+        elif item_pending:
+            # A format 1 block in between could take the SCENARIO line away
+            item_monologue = item_monologue or 'MONOLOGUE' in text
+            # "N SCENARIO:" followed by its '=' line completes the header
+            if (not item_monologue and i - 2 >= item_line + 3
+                    and prev and not prev.strip('=')
+                    and SCENARIO_LINE.search(prev2)):
+                item_pending = False
+        
+        lines.append(line)
+        size += len(line)
+        prev2, prev = prev, text
+    yield ''.join(lines)
+
+
+# Entries of one file keep the order they were always added in: format 1,
+# format 2 and format 3 blocks first, then the numbered lines.
+KIND_MONOLOGUE1, KIND_MONOLOGUE2, KIND_SCENARIO, KIND_LINE = range(4)
+
+# Category headers: "ITEMS 1-10 - EMPATHETIC PARTIAL (58 words)",
+# "ITEM 81 - BASIC SCENARIO (22 words)" and "--- EMPATHETIC PARTIAL ---"
+# sections. An entry belongs to the last header above it; headers with other
+# titles (GENERAL TAGS, ...) count as OTHER_CATEGORY. Only the start of a
+# header is matched with a regex, the title is cut out of the rest of the
+# line (see category_title): one pattern for the whole line backtracks
+# cubically on a '---' line with a long run of blanks and no closing '---'.
+CATEGORY_START = re.compile(r'^[ \t]*(?:(ITEMS?[ \t]+\d+(?:-\d+)?[ \t]*-)|---)', re.MULTILINE)
+CATEGORIES = {
+    'EMPATHETIC PARTIAL': 'empathetic_partial',
+    'MONOLOGUE SELFTALK': 'monologues_selftalk',
+    'CONVERSATION': 'conversation',
+    'CS ALPHANUMERIC': 'cs_alpha',
+    'CS NO-ALPHANUMERIC': 'cs_noalpha',
+    # Older files name the customer service sections after their direction
+    # tags: the tagless scripts are the alphanumeric ones
+    'CS TAGLESS': 'cs_alpha',
+    'CS TAGFULL': 'cs_noalpha',
+    'BASIC SCENARIO': 'basic_scenarios',
+    'BASIC SCENARIOS': 'basic_scenarios',
+    'MONOLOGUE': 'monologues',
+}
+OTHER_CATEGORY = 'other'
+# The same older names as categories, as in Daniel/role_assignments.csv
+CATEGORY_ALIASES = {'cs_tagless': 'cs_alpha', 'cs_tagfull': 'cs_noalpha'}
+# Section lines inside a block that don't start a new category
+NOT_CATEGORIES = {'', 'FULL SCRIPT'}
+# Target share of words per category in actor_stats.txt, in table order
+CATEGORY_TARGETS = {
+    'empathetic_partial': 22.0,
+    'monologues_selftalk': 11.0,
+    'conversation': 20.0,
+    'cs_alpha': 10.0,
+    'cs_noalpha': 6.0,
+    'basic_scenarios': 17.0,
+    'monologues': 14.0,
+}
+DEFAULT_QUOTA = 15000
+STATS_QUOTA = re.compile(r'^Word quota:\s*\d+\s*/\s*(\d+)', re.MULTILINE)
+# "Script: 3d7130a0_script | Role: ..." and "Source: 49c3d668" lines name the
+# script the lines below them come from, up to the next category header. The
+# id is kept as role_assignments.csv has it, without "_script" or a
+# "_A_used_" prefix.
+SCRIPT_LINE = re.compile(r'^[ \t]*(?:Script|Source):[ \t]*(?:\w*?_used_)?([^\s|_]+)', re.MULTILINE)
+
+
+def category_title(content, match):
+    """Return the title of the header line starting with a CATEGORY_START match, or None if it is no header.
+
+    An ITEM/ITEMS title runs up to a '(' or the end of the line; a section
+    title sits between the '---' and the last '---' of the line, which only
+    blanks may follow, and also stops at a '('.
+    """
+    line_end = content.find('\n', match.end())
+    rest = content[match.end():line_end if line_end != -1 else len(content)]
+    if match.group(1) is None:
+        rest = rest.rstrip(' \t')
+        if not rest.endswith('---'):
+            return None
+        rest = rest[:-3]
+    return rest.partition('(')[0].strip().upper()
+
+
+def category_headers(content, category=None):
+    """Return the (offset, category) of every category header in content.
+
+    The list starts with (0, category), the category in effect where
+    content starts.
+    """
+    headers = [(0, category)]
+    if not any(needle in content for needle in CATEGORY_NEEDLES):
+        return headers
+    for match in CATEGORY_START.finditer(content):
+        title = category_title(content, match)
+        if title is not None and title not in NOT_CATEGORIES:
+            headers.append((match.start(), CATEGORIES.get(title, OTHER_CATEGORY)))
+    return headers
+
+
+def script_changes(content, headers, script=None):
+    """Return the (offset, script id) of every place the script in effect changes.
+
+    The list starts with (0, script), the script in effect where content
+    starts; each of the category headers resets it to None until the next
+    Script:/Source: line.
+    """
+    changes = [(0, script)] + [(offset, None) for offset, _ in headers[1:]]
+    if 'Script:' in content or 'Source:' in content:
+        changes.extend((match.start(), match.group(1)) for match in SCRIPT_LINE.finditer(content))
+        changes.sort(key=lambda change: change[0])
+    return changes
+
+
+def removal_offsets(blocks):
+    """Return where each removed block's newline ended up in the content left behind."""
+    offsets = []
+    removed = 0
+    for start, stop, _, _ in blocks:
+        offsets.append(start - removed)
+        removed += stop - start - 1
+    return offsets
+
+
+def original_offset(offset, removals):
+    """Map an offset in content left by remove_blocks back to the content before.
+
+    removals holds (blocks, removal_offsets(blocks)) of each removal, last
+    one first.
+    """
+    for blocks, offsets in removals:
+        k = bisect.bisect_right(offsets, offset) - 1
+        if k >= 0:
+            start, stop = blocks[k][:2]
+            offset = start if offset == offsets[k] else stop + offset - offsets[k] - 1
+    return offset
+
+
+def parse_content(content, category=None, script=None):
+    """Return the (kind, line_num, text, category, script) entries of normalized content, in the order they were found.
+
+    category and script are the category and script id in effect where
+    content starts. A block takes the last script line before its end (the
+    Source: line of some monologues is inside them), a numbered line the
+    last one above it.
+    """
+    return parse_segment(content, category, script)[0]
+
+
+def parse_segment(content, category=None, script=None):
+    """Return the entries of content, as parse_content does, where each one is in content
+    and the (category, script) in effect at its end.
+
+    An entry is where its numbered line or the body of its block starts.
+    """
+    headers = category_headers(content, category)
+    header_offsets = [offset for offset, _ in headers]
+    scripts = script_changes(content, headers, script)
+    script_offsets = [offset for offset, _ in scripts]
+    
+    def category_at(offset):
+        return headers[bisect.bisect_right(header_offsets, offset) - 1][1]
+    
+    def script_at(offset):
+        return scripts[bisect.bisect_right(script_offsets, offset) - 1][1]
+    
+    # Only the formats whose needles are all in content are looked for
+    with stage('sniff', len(content)):
+        found = sniff(content)
+    
+    def planned_blocks(text, name, block_format, needles):
+        if not needles <= found:
+            return []
+        with stage(name, len(text)):
+            return find_blocks(text, block_format)
+    
+    # Extract monologues; each format is matched against the original content
+    monologues1 = planned_blocks(content, 'monologue1', MONOLOGUE1, MONOLOGUE1_NEEDLES)
+    monologues2 = planned_blocks(content, 'monologue2', MONOLOGUE2, MONOLOGUE2_NEEDLES)
+    scenarios = planned_blocks(content, 'scenario', SCENARIO, SCENARIO_NEEDLES)
+    file_entries = []
+    entry_offsets = []
+    for kind, blocks in ((KIND_MONOLOGUE1, monologues1), (KIND_MONOLOGUE2, monologues2),
+                         (KIND_SCENARIO, scenarios)):
+        file_entries.extend((kind, line_num, ' '.join(body.split()), category_at(stop - len(body)), script_at(stop))
+                            for _, stop, line_num, body in blocks)
+        entry_offsets.extend(stop - len(body) for _, stop, _, body in blocks)
+    
+    # Remove monologue sections for regular line processing, one format at a
+    # time; a format only needs matching again if an earlier removal changed
+    # the content
+    with stage('remove_blocks', len(content)):
+        cleaned = remove_blocks(content, monologues1)
+    if cleaned is not content:
+        monologues2 = planned_blocks(cleaned, 'monologue2', MONOLOGUE2, MONOLOGUE2_NEEDLES)
+    with stage('remove_blocks', len(cleaned)):
+        cleaned = remove_blocks(cleaned, monologues2)
+    if cleaned is not content:
+        scenarios = planned_blocks(cleaned, 'scenario', SCENARIO, SCENARIO_NEEDLES)
+    with stage('remove_blocks', len(cleaned)):
+        cleaned = remove_blocks(cleaned, scenarios)
+    removals = [(blocks, removal_offsets(blocks))
+                for blocks in (scenarios, monologues2, monologues1) if blocks]
+    
+    # Process regular numbered lines in a single pass over the remaining lines
+    split_lines = cleaned.split('\n')
+    with stage('strip_metadata', len(cleaned)):
+        line_offsets = [0]
+        for line in split_lines[:-1]:
+            line_offsets.append(line_offsets[-1] + len(line) + 1)
+        lines = strip_metadata(split_lines)
+    with stage('numbered_lines', len(cleaned)):
+        for i, line_num, text in numbered_lines(lines):
+            offset = original_offset(line_offsets[i], removals)
+            file_entries.append((KIND_LINE, line_num, text, category_at(offset), script_at(offset)))
+            entry_offsets.append(offset)
+    return file_entries, entry_offsets, (headers[-1][1], scripts[-1][1])
+
+
+def file_segments(filepath, segment_size=SEGMENT_SIZE):
+    """Yield the content of a file: whole up to segment_size, in read_segments segments above."""
+    if os.path.getsize(filepath) <= segment_size:
+        yield read_content(filepath)
+        return
+    segments = read_segments(filepath, segment_size)
+    if STAGE_TIMES is not None:
+        segments = timed_iter('segment', segments)
+    yield from segments
+
+
+def parse_file(filepath, cache_dir=None, segment_size=SEGMENT_SIZE):
+    """Yield the (kind, line_num, text, category, script) entries of one file.
+    
+    Files up to segment_size are parsed whole and cached in cache_dir (if
+    given); larger files are streamed a segment at a time.
+    """
+    if cache_dir is not None and os.path.getsize(filepath) <= segment_size:
+        yield from cached_entries(filepath, cache_dir)
+        return
+    category = script = None
+    for segment in file_segments(filepath, segment_size):
+        entries, _, (category, script) = parse_segment(segment, category, script)
+        yield from entries
+
+
+def file_digest(filepath):
+    """Return the SHA-256 hex digest of a file's bytes, hashed in place."""
+    with open(filepath, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return hashlib.sha256(data).hexdigest()
+
+
+def cached_entries(filepath, cache_dir):
+    """Return the entries of one file, reusing cached entries when its content was parsed before."""
+    with stage('cache'):
+        key = file_digest(filepath)
+        cache_path = os.path.join(cache_dir, f"v{PARSER_VERSION}-{key}.json")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return [tuple(entry) for entry in json.load(f)]
+        except (OSError, ValueError):
+            pass
+    
+    file_entries = parse_content(read_content(filepath))
+    with stage('cache'):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(file_entries, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return file_entries
+
+
+def iter_entries(input_files, cache_dir=None):
+    """Yield (line_num, priority, text, category, script) for the entries of all input files.
+    
+    The priority is (file index, kind, sequence number): of several entries
+    for the same line number, the one with the lowest priority is kept, which
+    is the first one found. Entries above the first category header of a
+    file take the last category and script of the file before it.
+    """
+    seq = 0
+    last = last_script = None
+    for file_index, filepath in enumerate(input_files):
+        if not os.path.exists(filepath):
+            print(f"Warning: {filepath} not found, skipping")
+            continue
+        for kind, line_num, text, category, script in parse_file(filepath, cache_dir):
+            if category is None:
+                category = last
+                if script is None:
+                    script = last_script
+            last, last_script = category, script
+            yield line_num, (file_index, kind, seq), text, category, script
+            seq += 1
+
+
+def pack_priority(priority):
+    """Pack a (file index, kind, sequence number) priority into one integer that sorts the same."""
+    file_index, kind, seq = priority
+    return file_index << 44 | kind << 40 | seq
+
+
+class EntryRun:
+    """The entries of one merge run, stored column by column.
+    
+    Line numbers and packed priorities live in arrays, the texts in one
+    UTF-8 buffer with end offsets, and (category, script) pairs as indices
+    into a small table, so an entry costs a few dozen bytes instead of a
+    tuple, a str and a dict slot. Line numbers too big for the array are
+    kept in a list instead.
+    """
+    __slots__ = ('line_nums', 'priorities', 'contexts', 'offsets', 'text', 'context_table', 'context_index')
+    
+    def __init__(self):
+        self.line_nums = array('Q')
+        self.priorities = array('Q')
+        self.contexts = array('I')
+        self.offsets = array('Q', [0])
+        self.text = bytearray()
+        self.context_table = []
+        self.context_index = {}
+    
+    def __len__(self):
+        return len(self.line_nums)
+    
+    def append(self, line_num, priority, text, category, script=None):
+        context = (category, script)
+        index = self.context_index.get(context)
+        if index is None:
+            index = self.context_index[context] = len(self.context_table)
+            self.context_table.append(context)
+        try:
+            self.line_nums.append(line_num)
+        except OverflowError:
+            # A number of 2**64 or more (a long id at the start of a line)
+            # doesn't fit the array; the run keeps a list until it is emptied
+            self.line_nums = list(self.line_nums)
+            self.line_nums.append(line_num)
+        self.priorities.append(pack_priority(priority))
+        self.contexts.append(index)
+        self.text += text.encode('utf-8')
+        self.offsets.append(len(self.text))
+    
+    def sorted_entries(self):
+        """Yield (line_num, priority, text, category, script) in line number order,
+        keeping only the entry with the lowest priority of each line number.
+        """
+        # Two stable sorts order by line number, then priority, without building key tuples
+        order = sorted(range(len(self)), key=self.priorities.__getitem__)
+        order.sort(key=self.line_nums.__getitem__)
+        previous = None
+        for i in order:
+            line_num = self.line_nums[i]
+            if line_num != previous:
+                previous = line_num
+                text = self.text[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+                yield (line_num, self.priorities[i], text) + self.context_table[self.contexts[i]]
+
+
+def spill_run(entries, path):
+    """Write an EntryRun to path sorted by line number, then empty it."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries.sorted_entries():
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    entries.__init__()
+
+
+def read_run(path):
+    """Yield the (line_num, priority, text, category, script) entries of a spilled run."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield tuple(json.loads(line))
+
+
+def merge_entries(entry_stream, run_size=RUN_SIZE):
+    """Yield one (line_num, text, category, script) per line number, in line number order.
+    
+    Of several entries for a line number, the one with the lowest priority
+    is kept. At most run_size entries are held in memory, in an EntryRun;
+    beyond that, sorted runs are spilled to a temporary directory and
+    merged back at the end.
+    """
+    entries = EntryRun()
+    with tempfile.TemporaryDirectory() as run_dir:
+        runs = []
+        for entry in entry_stream:
+            entries.append(*entry)
+            if len(entries) >= run_size:
+                runs.append(os.path.join(run_dir, f"run{len(runs)}.jsonl"))
+                spill_run(entries, runs[-1])
+        
+        previous = None
+        for line_num, _, text, category, script in heapq.merge(*map(read_run, runs), entries.sorted_entries()):
+            if line_num != previous:
+                previous = line_num
+                yield line_num, text, category, script
+
+
+@contextmanager
+def atomic_open(path, **kwargs):
+    """Open a temporary file next to path for writing, which replaces path
+    once it is closed without an error, so readers never see a partial file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', **kwargs) as f:
+            yield f
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_output(entries, output_file, texts_file=None, plain_file=None, tags_file=None,
+                 language=DEFAULT_LANGUAGE):
+    """Clean (line_num, text, category, script) entries in line number order and write them out in one pass.
+
+    output_file gets "N  text" lines; texts_file, if given, gets "N text"
+    lines and plain_file the text alone, one line per entry each. tags_file,
+    if given, gets one TAG_FIELDS row per direction tag, its offset counted
+    in the cleaned text. Returns the lines and words written per category,
+    the line numbers of every normalized tag and those of every script id.
+    """
+    count = 0
+    # category -> [lines, words], counted as the entries go by
+    stats = {}
+    # normalized tag -> line numbers, in order
+    tag_lines = {}
+    # script id -> line numbers, in order
+    script_lines = {}
+    with ExitStack() as stack:
+        f = stack.enter_context(atomic_open(output_file, encoding='utf-8', buffering=WRITE_BUFFER))
+        texts, plain = (stack.enter_context(atomic_open(path, encoding='utf-8', buffering=WRITE_BUFFER))
+                        if path else None for path in (texts_file, plain_file))
+        tags = None
+        if tags_file:
+            tags = csv.writer(stack.enter_context(atomic_open(tags_file, encoding='utf-8', newline='',
+                                                              buffering=WRITE_BUFFER)),
+                              delimiter='\t', lineterminator='\n')
+            tags.writerow(TAG_FIELDS)
+        # Apply all cleanup AFTER joining
+        cleaned_entries = ((num, category, script, clean_text(text)) for num, text, category, script in entries)
+        if STAGE_TIMES is not None:
+            cleaned_entries = timed_iter('clean_text', cleaned_entries, size=lambda entry: len(entry[-1]))
+        for num, category, script, cleaned in cleaned_entries:
+            if cleaned:  # Only add if there's content after cleaning
+                f.write(f"\n{num}  {cleaned}" if count else f"{num}  {cleaned}")
+                if texts:
+                    texts.write(f"{num} {cleaned}\n")
+                if plain:
+                    plain.write(f"{cleaned}\n")
+                totals = stats.setdefault(category or OTHER_CATEGORY, [0, 0])
+                totals[0] += 1
+                totals[1] += len(cleaned.split())
+                for offset, tag, normalized in direction_tags(cleaned):
+                    if tags:
+                        tags.writerow([num, tag, offset, normalized, language])
+                    lines = tag_lines.setdefault(normalized, [])
+                    if not lines or lines[-1] != num:
+                        lines.append(num)
+                if script is not None:
+                    script_lines.setdefault(script, []).append(num)
+                count += 1
+    
+    print(f"Processed {count} lines to {output_file}")
+    return stats, tag_lines, script_lines
+
+
+def write_tag_index(tag_lines, index_file, language=DEFAULT_LANGUAGE):
+    """Write the line numbers of every normalized tag to index_file as JSON."""
+    with atomic_open(index_file, encoding='utf-8') as f:
+        json.dump({'language': language, 'tags': tag_lines}, f, ensure_ascii=False, sort_keys=True)
+
+
+def write_script_index(script_lines, index_file):
+    """Write the line numbers of every script id, and the script id of every line, to index_file as JSON."""
+    lines = {num: script for script, nums in script_lines.items() for num in nums}
+    with atomic_open(index_file, encoding='utf-8') as f:
+        json.dump({'scripts': script_lines, 'lines': {str(num): lines[num] for num in sorted(lines)}},
+                  f, ensure_ascii=False, sort_keys=True)
+
+
+def read_quota(stats_file):
+    """Return the word quota of an existing actor_stats.txt, or DEFAULT_QUOTA."""
+    try:
+        with open(stats_file, 'r', encoding='utf-8') as f:
+            match = STATS_QUOTA.search(f.read())
+    except OSError:
+        return DEFAULT_QUOTA
+    return int(match.group(1)) if match else DEFAULT_QUOTA
+
+
+def write_stats(stats, stats_file, scripts, quota=None):
+    """Write actor_stats.txt from the lines and words per category.
+
+    The word quota of the existing file is kept unless one is given.
+    """
+    if quota is None:
+        quota = read_quota(stats_file)
+    total_lines = sum(lines for lines, _ in stats.values())
+    total_words = sum(words for _, words in stats.values())
+    rule = '=' * 75
+    separator = '+'.join(['-' * 21, '-' * 8, '-' * 8, '-' * 10, '-' * 10, '-' * 7])
+    status = 'COMPLETE' if total_words >= quota else 'IN PROGRESS'
+    out = [
+        "ACTOR STATISTICS", rule, "",
+        f"Total lines:   {total_lines}",
+        f"Total words:   {total_words}",
+        f"Scripts count: {scripts}", "",
+        f"Word quota:    {total_words} / {quota} ({total_words / quota * 100 if quota else 0.0:.1f}%) - {status}", "",
+        rule, "BREAKDOWN BY CATEGORY", rule, "",
+        f"{'Category':<20} | {'Lines':>6} | {'Words':>6} | {'Actual %':>8} | {'Target %':>8} | {'Diff':>6}",
+        separator,
+    ]
+    categories = list(CATEGORY_TARGETS) + sorted(set(stats) - set(CATEGORY_TARGETS))
+    for category in categories:
+        lines, words = stats.get(category, (0, 0))
+        actual = words / total_words * 100 if total_words else 0.0
+        target = CATEGORY_TARGETS.get(category, 0.0)
+        diff = f"{actual - target:+.1f}%" if total_words else "N/A"
+        out.append(f"{category:<20} | {lines:>6} | {words:>6} | {actual:>7.1f}% | {target:>7.1f}% | {diff:>6}")
+    out += [separator, f"{'TOTAL':<20} | {total_lines:>6} | {total_words:>6} | {100.0:>7.1f}% | {100.0:>7.1f}% |"]
+    with atomic_open(stats_file, encoding='utf-8') as f:
+        f.write('\n'.join(out) + '\n')
+
+
+def process_files(input_files, output_file, cache_dir=None, texts_file=None, plain_file=None,
+                  report_file=None, profile_file=None, stats_file=None, tags_file=None, tag_index_file=None,
+                  language=DEFAULT_LANGUAGE, store_file=None, script_index_file=None):
+    """Parse input_files and write the numbered line files.
+
+    With a stats_file, actor_stats.txt is written from the same entries;
+    with a tags_file and tag_index_file, the direction tag table and the
+    tag -> line numbers index (see write_output and write_tag_index); with a
+    script_index_file, the script id <-> line numbers index (write_script_index).
+    With a store_file, the entries of changed files are also written to that
+    SQLite database under the name of output_file's folder (see line_store.py).
+    With a report_file, the wall time, characters and calls of every stage
+    are written there as JSON; with a profile_file, the run is profiled with
+    cProfile and the stats dumped there (readable with pstats or snakeviz).
+    """
+    global STAGE_TIMES
+    profiler = cProfile.Profile() if profile_file else None
+    if report_file:
+        STAGE_TIMES = {}
+        active_stage[:] = ['write', time.perf_counter()]
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        entries = merge_entries(iter_entries(input_files, cache_dir))
+        if STAGE_TIMES is not None:
+            entries = timed_iter('merge', entries, size=lambda entry: len(entry[1]))
+        stats, tag_lines, script_lines = write_output(entries, output_file, texts_file, plain_file, tags_file,
+                                                      language)
+        if tag_index_file:
+            write_tag_index(tag_lines, tag_index_file, language)
+        if script_index_file:
+            write_script_index(script_lines, script_index_file)
+        if stats_file:
+            write_stats(stats, stats_file, sum(1 for filepath in input_files if os.path.exists(filepath)))
+        if store_file:
+            # Imported only when used: line_store imports this module
+            from line_store import update_store
+            actor = os.path.basename(os.path.dirname(os.path.abspath(output_file)))
+            update_store(store_file, actor, input_files, cache_dir)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+        if report_file:
+            switch_stage('write')
+            write_report(report_file, input_files, time.perf_counter() - start)
+            STAGE_TIMES = None
+
+
+def write_report(report_file, input_files, total_seconds):
+    """Write the collected stage timings to report_file as JSON."""
+    stages = sorted(STAGE_TIMES.items(), key=lambda item: STAGES.index(item[0]))
+    report = {
+        'input_files': list(input_files),
+        'input_bytes': sum(os.path.getsize(filepath) for filepath in input_files if os.path.exists(filepath)),
+        'total_seconds': round(total_seconds, 6),
+        'stages': {name: {'seconds': round(seconds, 6), 'chars': chars, 'calls': calls}
+                   for name, (seconds, chars, calls) in stages},
+    }
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+
+def warm_cache(filepath, cache_dir):
+    """Parse one file into cache_dir, without sending its entries back.
+
+    Files over SEGMENT_SIZE are never cached, so they are left to build_actor.
+    """
+    if os.path.getsize(filepath) <= SEGMENT_SIZE:
+        cached_entries(filepath, cache_dir)
+
+
+def find_actor_dirs(root):
+    """Map each folder directly under root to its sorted actor_assignments*.txt files."""
+    actors = {}
+    for filepath in sorted(glob.glob(os.path.join(root, '*', 'actor_assignments*.txt'))):
+        actors.setdefault(os.path.dirname(filepath), []).append(filepath)
+    return actors
+
+
+def actor_files(dirs):
+    """Map each of dirs to its sorted actor_assignments*.txt files, leaving out folders without any."""
+    actors = {}
+    for actor_dir in dirs:
+        files = sorted(glob.glob(os.path.join(actor_dir, 'actor_assignments*.txt')))
+        if files:
+            actors[actor_dir] = files
+    return actors
+
+
+def build_actor(actor_dir, files, cache_dir=CACHE_DIR, store_file=None):
+    """Rebuild every output file of one actor folder from its assignment files."""
+    process_files(files, os.path.join(actor_dir, OUTPUT_NAME), cache_dir,
+                  os.path.join(actor_dir, TEXTS_NAME), os.path.join(actor_dir, PLAIN_NAME),
+                  stats_file=os.path.join(actor_dir, STATS_NAME),
+                  tags_file=os.path.join(actor_dir, TAGS_NAME),
+                  tag_index_file=os.path.join(actor_dir, TAG_INDEX_NAME),
+                  script_index_file=os.path.join(actor_dir, SCRIPT_INDEX_NAME), store_file=store_file)
+
+
+def build_all(root, max_workers=None, cache_dir=CACHE_DIR):
+    """Rebuild the numbered, plain text and tag files and actor_stats.txt of every actor folder under root."""
+    build_dirs(find_actor_dirs(root), max_workers, cache_dir)
+
+
+def build_dirs(actors, max_workers=None, cache_dir=CACHE_DIR, store_file=None):
+    """Rebuild the output files of actors, a mapping of actor folder -> assignment files.
+
+    With a cache_dir, files are first parsed in parallel across all actors
+    (only files whose content is not in the cache yet are actually parsed);
+    each actor's entries are then merged in file order and written out, also
+    in the pool. With a store_file, the SQLite line store is updated too.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        if cache_dir is not None:
+            parsed = [pool.submit(warm_cache, filepath, cache_dir)
+                      for files in actors.values() for filepath in files]
+            for parse in parsed:
+                parse.result()
+        writes = [pool.submit(build_actor, actor_dir, files, cache_dir, store_file)
+                  for actor_dir, files in actors.items()]
+        for write in writes:
+            write.result()
+
+
+if __name__ == "__main__":
+    build_all(sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+fun_lines_cli.py - The fun-lines command.
+
+One entry point for every tool in the repo, so orchestration can build
+many actors in a single process instead of starting Python (and
+compiling the parser's regexes) once per actor. Nothing is imported
+until a command runs, and then only that command's module.
+
+Usage: fun-lines build [DIR|GLOB ...] [--jobs N] [--no-cache] [--store [DB]]
+       fun-lines COMMAND [ARGS ...]   (see fun-lines --help)
+"""
+
+import os
+import sys
+import glob
+import argparse
+import importlib
+
+# command -> (module whose main(argv) runs it, help)
+COMMANDS = {
+    'build': (None, "rebuild the numbered files of actor folders"),
+    'renumber': ('renumber', "shift the line numbers in assignment files"),
+    'search': ('search_lines', "find which actor recorded a line"),
+    'tags': ('tag_index', "count and filter lines by direction tag"),
+    'align': ('align_lines', "align german_autumn_lines.txt with Autumn's lines"),
+    'lang': ('lang_tags', "tag code-switched words as German or English"),
+    'assign': ('assign_roles', "assign scripts to actors against their targets"),
+    'script': ('script_index', "find the lines of a script, or the script of a line"),
+    'store': ('line_store', "keep every actor's parsed lines in a SQLite database"),
+    'check': ('check_numbering', "report numbering gaps, collisions and header mismatches"),
+    'watch': ('watch', "rebuild actor folders as their assignment files change"),
+    'bench': ('bench', "benchmark the parser on a synthetic corpus"),
+}
+
+
+def expand_dirs(patterns):
+    """Return the folders named by patterns (paths or glob patterns), in order, without repeats."""
+    dirs = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            path = os.path.normpath(path)
+            if os.path.isdir(path) and path not in dirs:
+                dirs.append(path)
+    return dirs
+
+
+def build(argv):
+    parser = argparse.ArgumentParser(prog="fun-lines build",
+                                     description="Rebuild the numbered files of actor folders.")
+    parser.add_argument('dirs', nargs='*', metavar='DIR',
+                        help="actor folders or glob patterns (default: every actor folder under the current one)")
+    parser.add_argument('--jobs', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--no-cache', action='store_true', help="parse every file again")
+    parser.add_argument('--store', nargs='?', const='', metavar='DB',
+                        help="also update the SQLite line store (default: .index/lines.sqlite)")
+    args = parser.parse_args(argv)
+
+    # Imported only now: the parser compiles its patterns at import time
+    from fun_lines import CACHE_DIR, actor_files, find_actor_dirs, build_dirs
+
+    actors = actor_files(expand_dirs(args.dirs)) if args.dirs else find_actor_dirs(os.getcwd())
+    if not actors:
+        parser.error("no actor_assignments*.txt files found")
+    store_file = args.store
+    if store_file == '':
+        from line_store import STORE_FILE as store_file
+    build_dirs(actors, args.jobs, None if args.no_cache else CACHE_DIR, store_file)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    commands = '\n'.join(f"  {name:<10} {help}" for name, (_, help) in COMMANDS.items())
+    parser = argparse.ArgumentParser(prog="fun-lines", formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     description=f"commands:\n{commands}",
+                                     epilog="Run fun-lines COMMAND --help for the options of a command.")
+    parser.add_argument('command', choices=COMMANDS, metavar='COMMAND')
+    # Everything after the command belongs to the command
+    args = parser.parse_args(argv[:1])
+
+    module = COMMANDS[args.command][0]
+    if module is None:
+        build(argv[1:])
+    else:
+        importlib.import_module(module).main(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+lang_tags.py - Tag the words of code-switched lines as German or English.
+
+A naive Bayes model over character n-grams (1- to 3-grams of each word)
+plus the words themselves is trained offline from the repo: English
+from every actor's all_lines_numbered.txt, German from the words of
+german_autumn_lines.txt (and its direction tags) that are far more
+frequent there than in the English lines. Words of both languages
+("in", "so", "die") are then found by tagging german_autumn_lines.txt
+once and marked ambiguous, so they follow the words around them. The
+model is saved under .index/ and retrained only when asked to.
+
+Scoring works on distinct words: each new word is scored once, a batch
+of lines at a time (with NumPy when it is installed, in plain Python
+otherwise), and every later occurrence is a dict lookup. Words the model
+is unsure about take the language of the nearest sure word before them
+(or after, at the start of a line), so "die" or "so" follow their
+sentence. Per line, the switch count is the number of language changes
+between consecutive words, and the German ratio is the share of German words.
+
+Usage: lang_tags.py [FILE ...] [--train] [--out lines.tsv] [--show N]
+"""
+
+import re
+import os
+import sys
+import csv
+import glob
+import json
+import math
+import time
+import argparse
+from operator import ne
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from fun_lines import OUTPUT_NAME, DIRECTION_TAG
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GERMAN_FILE = os.path.join(ROOT, "german_autumn_lines.txt")
+MODEL_FILE = os.path.join(ROOT, ".index", "lang_model.json")
+MODEL_VERSION = 3
+LANGUAGES = ("de", "en")
+NGRAM_SIZES = (1, 2, 3)
+# Words scoring closer to 0 than this take the language of their neighbours
+MARGIN = 2.0
+BATCH_LINES = 10_000
+# A word of german_autumn_lines.txt counts as German if it is this many
+# times more frequent there than in the English lines
+GERMAN_RATIO = 4.0
+# An English word is ambiguous if at least AMBIGUOUS_COUNT and at least
+# AMBIGUOUS_SHARE of its occurrences in german_autumn_lines.txt sit between
+# German words
+AMBIGUOUS_COUNT = 3
+AMBIGUOUS_SHARE = 0.5
+
+# Words of letters, with inner apostrophes (hat's, I'm)
+WORD = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+# "N text", "N  text" and "N|text" numbered lines
+NUMBERED = re.compile(r'(\d+)(?:\s+|\|)(.*)')
+TSV_FIELDS = ["line", "words", "de", "en", "switches", "de_ratio"]
+
+
+def ngrams(word):
+    """Return the character n-grams of a word, padded with spaces at both ends."""
+    padded = f" {word.casefold()} "
+    return [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+
+
+def read_numbered(filepath):
+    """Yield (line_num, text) for the numbered lines of a file."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = NUMBERED.match(line.rstrip('\n'))
+            if match:
+                yield int(match.group(1)), match.group(2)
+
+
+def spoken_words(text):
+    """Return the words of a line, leaving out its direction tags."""
+    if '[' in text:
+        text = DIRECTION_TAG.sub(' ', text)
+    return WORD.findall(text)
+
+
+def train(root=ROOT, german_file=GERMAN_FILE):
+    """Return a model trained on the English actor lines and the German-only words of german_file."""
+    english = Counter()
+    for filepath in glob.glob(os.path.join(root, '*', OUTPUT_NAME)):
+        for _, text in read_numbered(filepath):
+            english.update(word.casefold() for word in spoken_words(text))
+    mixed = Counter()
+    for _, text in read_numbered(german_file):
+        words = spoken_words(text) + [word for tag in DIRECTION_TAG.findall(text) for word in WORD.findall(tag)]
+        mixed.update(word.casefold() for word in words)
+    english_total = sum(english.values()) or 1
+    mixed_total = sum(mixed.values()) or 1
+    german = Counter({word: count for word, count in mixed.items()
+                      if count / mixed_total > GERMAN_RATIO * english[word] / english_total})
+
+    counts = {}
+    totals = []
+    for k, words in enumerate((german, english)):
+        total = 0
+        for word, count in words.items():
+            for gram in ngrams(word):
+                counts.setdefault(gram, [0, 0])[k] += count
+                total += count
+        totals.append(total)
+    # Add-one smoothed log likelihood ratio of German over English per n-gram
+    vocabulary = len(counts)
+    unseen = math.log((totals[1] + vocabulary) / (totals[0] + vocabulary))
+    weights = {gram: math.log((de + 1) / (en + 1)) + unseen for gram, (de, en) in counts.items()}
+    # Log ratio of word frequencies, for the words seen in training
+    german_total = sum(german.values()) or 1
+    words = {word: math.log((german[word] + 0.5) / german_total) - math.log((english[word] + 0.5) / english_total)
+             for word in german.keys() | english.keys()}
+    model = {'version': MODEL_VERSION, 'unseen': unseen, 'weights': weights, 'words': words, 'ambiguous': []}
+
+    # English words that keep turning up inside German sentences are shared
+    tagger = Tagger(model)
+    german_context = Counter()
+    for _, words, labels in tagger.tag_lines(read_numbered(german_file)):
+        for i in range(1, len(words) - 1):
+            if labels[i - 1] == labels[i + 1] == 'de':
+                german_context[words[i].casefold()] += 1
+    model['ambiguous'] = sorted(word for word, count in german_context.items()
+                                if english[word] and count >= max(AMBIGUOUS_COUNT, AMBIGUOUS_SHARE * mixed[word]))
+    return model
+
+
+def load_model(model_file=MODEL_FILE, retrain=False):
+    """Return the saved model, training and saving one first if there is none."""
+    if not retrain:
+        try:
+            with open(model_file, 'r', encoding='utf-8') as f:
+                model = json.load(f)
+            if model['version'] == MODEL_VERSION:
+                return model
+        except (OSError, ValueError, KeyError):
+            pass
+    model = train()
+    os.makedirs(os.path.dirname(model_file), exist_ok=True)
+    tmp_path = f"{model_file}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(model, f, ensure_ascii=False)
+    os.replace(tmp_path, model_file)
+    return model
+
+
+class Tagger:
+    """Tags words with a model, scoring each distinct word once."""
+
+    def __init__(self, model):
+        self.weights = model['weights']
+        self.unseen = model['unseen']
+        self.words = model['words']
+        self.ambiguous = set(model['ambiguous'])
+        # word -> score, > 0 German, < 0 English
+        self.scores = {}
+        # word -> 'de', 'en', or None when the score is within MARGIN of 0
+        self.labels = {}
+        if np is not None:
+            self.gram_ids = {gram: i for i, gram in enumerate(self.weights)}
+            # The last slot holds the weight of unseen n-grams
+            self.weight_array = np.array(list(self.weights.values()) + [self.unseen])
+
+    def score_new(self, words):
+        """Score the words not scored yet, all at once."""
+        new = [word for word in set(words) if word not in self.scores]
+        if not new:
+            return
+        # Ambiguous words score 0 and follow their neighbours
+        scores = {word: 0.0 for word in new if word.casefold() in self.ambiguous}
+        new = [word for word in new if word not in scores]
+        if np is None:
+            weights, unseen = self.weights, self.unseen
+            for word in new:
+                scores[word] = (sum(weights.get(gram, unseen) for gram in ngrams(word))
+                                + self.words.get(word.casefold(), 0.0))
+        elif new:
+            unseen_id = len(self.gram_ids)
+            ids, starts = [], []
+            for word in new:
+                starts.append(len(ids))
+                ids.extend(self.gram_ids.get(gram, unseen_id) for gram in ngrams(word))
+            sums = np.add.reduceat(self.weight_array[np.array(ids)], np.array(starts))
+            scores.update((word, score + self.words.get(word.casefold(), 0.0))
+                          for word, score in zip(new, sums.tolist()))
+        self.scores.update(scores)
+        self.labels.update((word, None if -MARGIN < score < MARGIN else LANGUAGES[score < 0])
+                           for word, score in scores.items())
+
+    def tag(self, words):
+        """Return 'de' or 'en' for each word, once score_new has seen them."""
+        labels = list(map(self.labels.__getitem__, words))
+        if None not in labels:
+            return labels
+        # Unsure words follow the sure word before them, or after them at the start
+        current = next((label for label in labels if label), None)
+        for i, label in enumerate(labels):
+            if label:
+                current = label
+            else:
+                labels[i] = current or LANGUAGES[self.scores[words[i]] < 0]
+        return labels
+
+    def tag_lines(self, lines):
+        """Yield (line_num, words, labels) for (line_num, text) lines, a batch at a time."""
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= BATCH_LINES:
+                yield from self.tag_batch(batch)
+                batch = []
+        yield from self.tag_batch(batch)
+
+    def tag_batch(self, batch):
+        split = [(num, spoken_words(text)) for num, text in batch]
+        self.score_new([word for _, words in split for word in words])
+        for num, words in split:
+            yield num, words, self.tag(words)
+
+
+def line_stats(labels):
+    """Return (German words, English words, switches) of a tagged line."""
+    de = labels.count('de')
+    switches = sum(map(ne, labels, labels[1:]))
+    return de, len(labels) - de, switches
+
+
+def segments(words, labels):
+    """Return the line as runs of one language, like "de: Ach, ich hab | en: My brain"."""
+    runs = []
+    for word, label in zip(words, labels):
+        if runs and runs[-1][0] == label:
+            runs[-1][1].append(word)
+        else:
+            runs.append((label, [word]))
+    return ' | '.join(f"{label}: {' '.join(run)}" for label, run in runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tag the words of code-switched lines as German or English.")
+    parser.add_argument('files', nargs='*', default=[GERMAN_FILE], help="numbered files (default: german_autumn_lines.txt)")
+    parser.add_argument('--train', action='store_true', help="retrain the model before tagging")
+    parser.add_argument('--model', default=MODEL_FILE)
+    parser.add_argument('--out', metavar='TSV', help="write per-line counts, switches and German ratio")
+    parser.add_argument('--show', type=int, default=0, metavar='N', help="print the first N lines as segments")
+    args = parser.parse_args(argv)
+
+    tagger = Tagger(load_model(args.model, args.train))
+    lines = total_words = total_de = total_switches = mixed = 0
+    start = time.perf_counter()
+    with open(args.out or os.devnull, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(TSV_FIELDS)
+        for filepath in args.files:
+            for num, words, labels in tagger.tag_lines(read_numbered(filepath)):
+                de, en, switches = line_stats(labels)
+                writer.writerow([num, len(words), de, en, switches, f"{de / len(words):.3f}" if words else ""])
+                lines += 1
+                total_words += len(words)
+                total_de += de
+                total_switches += switches
+                mixed += bool(de and en)
+                if lines <= args.show:
+                    print(f"{num}: {segments(words, labels)}")
+    seconds = time.perf_counter() - start
+
+    print(f"{lines} lines, {total_words} words in {seconds:.2f}s ({lines / max(seconds, 1e-9):,.0f} lines/s)")
+    words = total_words or 1
+    print(f"German words: {total_de / words:.1%}, mixed lines: {mixed}, "
+          f"switches: {total_switches} ({total_switches / words * 100:.1f} per 100 words)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
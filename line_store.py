@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+line_store.py - Keep the parsed lines of every actor in a SQLite database.
+
+The entries table has one row per parsed entry: actor, line number,
+cleaned text, category, script id, source file, direction tags (a JSON
+list of normalized tags) and word count. The lines view holds what
+all_lines_numbered.txt holds: for each actor and number, the entry
+fun_lines.py keeps (earliest file, then blocks before lines, then first
+found), unless its text is empty.
+
+Updates are incremental, keyed on the SHA-256 of each source file: a file
+whose content, and the category and script it starts under, are the same
+as at the last update keeps its rows. Changed files get their rows
+replaced in bulk and files that are gone lose them, all of one actor in a
+single transaction.
+
+Usage: line_store.py [DIR|GLOB ...] [--db PATH] [--sql QUERY] [--no-cache]
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+
+from fun_lines import (CACHE_DIR, OTHER_CATEGORY, PARSER_VERSION, clean_text, direction_tags, file_digest,
+                       parse_file, actor_files, find_actor_dirs)
+from fun_lines_cli import expand_dirs
+
+STORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".index", "lines.sqlite")
+STORE_VERSION = 1
+# Kept in PRAGMA user_version; rows parsed by another parser are dropped
+SCHEMA_VERSION = STORE_VERSION * 1000 + PARSER_VERSION
+# Largest SQLite INTEGER; the entries of bigger line numbers (long ids at
+# the start of a line) are left out of the store
+MAX_LINE = 2**63 - 1
+# How long a writer waits for another process's transaction, in seconds
+BUSY_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    actor TEXT NOT NULL,
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    -- category and script in effect where the file starts, and where it ends
+    carry_category TEXT,
+    carry_script TEXT,
+    last_category TEXT,
+    last_script TEXT,
+    PRIMARY KEY (actor, file)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    actor TEXT NOT NULL,
+    file TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    category TEXT NOT NULL,
+    script TEXT,
+    tags TEXT,
+    words INTEGER NOT NULL,
+    PRIMARY KEY (actor, file, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_line ON entries (actor, line);
+CREATE INDEX IF NOT EXISTS entries_category ON entries (category);
+CREATE INDEX IF NOT EXISTS entries_script ON entries (script);
+CREATE VIEW IF NOT EXISTS lines AS
+SELECT actor, line, text, category, script, file, tags, words FROM (
+    SELECT entries.*, row_number() OVER (
+        PARTITION BY entries.actor, entries.line ORDER BY files.position, entries.kind, entries.seq) AS rank
+    FROM entries JOIN files ON files.actor = entries.actor AND files.file = entries.file)
+WHERE rank = 1 AND text != '';
+"""
+
+
+def connect(db_file=STORE_FILE):
+    """Open the store, creating it (or recreating it for a new parser version) if needed."""
+    os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+    db = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT, isolation_level=None)
+    db.execute("PRAGMA journal_mode = WAL")
+    if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        db.execute("BEGIN IMMEDIATE")
+        if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for statement in ("DROP VIEW IF EXISTS lines", "DROP TABLE IF EXISTS entries", "DROP TABLE IF EXISTS files"):
+                db.execute(statement)
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        db.execute("COMMIT")
+    db.executescript(SCHEMA)
+    return db
+
+
+def entry_rows(actor, name, filepath, carry, cache_dir=None):
+    """Return the entries rows of one file and the (category, script) in effect at its end.
+
+    Entries above the first category header of a file take the category
+    and script of the file before it, as in fun_lines.iter_entries.
+    """
+    last_category, last_script = carry
+    rows = []
+    for seq, (kind, line_num, text, category, script) in enumerate(parse_file(filepath, cache_dir)):
+        if category is None:
+            category = last_category
+            if script is None:
+                script = last_script
+        last_category, last_script = category, script
+        if line_num > MAX_LINE:
+            print(f"Warning: {filepath}: line number {line_num} is too big for the store, skipping")
+            continue
+        cleaned = clean_text(text)
+        tags = [normalized for _, _, normalized in direction_tags(cleaned)]
+        rows.append((actor, name, seq, kind, line_num, cleaned, category or OTHER_CATEGORY, script,
+                     json.dumps(tags, ensure_ascii=False) if tags else None, len(cleaned.split())))
+    return rows, (last_category, last_script)
+
+
+def update_actor(db, actor, input_files, cache_dir=None):
+    """Bring the rows of one actor up to date with its input files; return how many files were parsed."""
+    names = [os.path.basename(filepath) for filepath in input_files]
+    parsed = 0
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        stored = {row[0]: row[1:] for row in db.execute(
+            "SELECT file, digest, carry_category, carry_script, last_category, last_script"
+            " FROM files WHERE actor = ?", (actor,))}
+        present = {name for name, filepath in zip(names, input_files) if os.path.exists(filepath)}
+        for name in stored.keys() - present:
+            db.execute("DELETE FROM entries WHERE actor = ? AND file = ?", (actor, name))
+            db.execute("DELETE FROM files WHERE actor = ? AND file = ?", (actor, name))
+
+        carry = (None, None)
+        for position, (name, filepath) in enumerate(zip(names, input_files)):
+            if name not in present:
+                continue
+            digest = file_digest(filepath)
+            row = stored.get(name)
+            if row is not None and row[0] == digest and tuple(row[1:3]) == carry:
+                db.execute("UPDATE files SET position = ? WHERE actor = ? AND file = ?", (position, actor, name))
+                carry = tuple(row[3:5])
+                continue
+            rows, last = entry_rows(actor, name, filepath, carry, cache_dir)
+            db.execute("DELETE FROM entries WHERE actor = ? AND file = ?", (actor, name))
+            db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                       (actor, name, position, digest, *carry, *last))
+            carry = last
+            parsed += 1
+        db.execute("COMMIT")
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    return parsed
+
+
+def update_store(db_file, actor, input_files, cache_dir=None):
+    """Update the rows of one actor in the store at db_file; return how many files were parsed."""
+    db = connect(db_file)
+    try:
+        return update_actor(db, actor, input_files, cache_dir)
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the parsed lines of every actor in a SQLite database.")
+    parser.add_argument('dirs', nargs='*', metavar='DIR',
+                        help="actor folders or glob patterns (default: every actor folder under the current one)")
+    parser.add_argument('--db', default=STORE_FILE, help="SQLite database (default: .index/lines.sqlite)")
+    parser.add_argument('--sql', metavar='QUERY', help="run a query after updating and print its rows")
+    parser.add_argument('--no-cache', action='store_true', help="parse changed files again instead of using .cache/")
+    args = parser.parse_args(argv)
+
+    actors = actor_files(expand_dirs(args.dirs)) if args.dirs else find_actor_dirs(os.getcwd())
+    if not actors and not args.sql:
+        parser.error("no actor_assignments*.txt files found")
+    db = connect(args.db)
+    try:
+        for actor_dir, files in actors.items():
+            actor = os.path.basename(os.path.normpath(actor_dir))
+            parsed = update_actor(db, actor, files, None if args.no_cache else CACHE_DIR)
+            print(f"{actor}: {parsed} of {len(files)} files updated")
+        if args.sql:
+            for row in db.execute(args.sql):
+                print('\t'.join('' if value is None else str(value) for value in row))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+renumber.py - Shift the line numbers in actor assignment files.
+
+Adds an offset to the number at the start of every line of the
+actor_assignments*.txt files in one or more actor folders. Offsets are
+given as rules (start_file, end_file, offset): a file numbered from
+start_file to end_file (inclusive, None for no end) gets that offset,
+and the first matching rule wins. Files no rule covers are left alone.
+
+Each file is streamed line by line into a temporary file next to it,
+which then replaces the original in one rename, so a crash never leaves
+a half-written assignment file behind. Folders are processed in parallel.
+
+Usage: renumber.py --rule 8::612 [--rule START:END:OFFSET ...] DIR [DIR ...]
+"""
+
+import re
+import os
+import sys
+import glob
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# Number at the start of a line followed by whitespace
+LINE_NUMBER = re.compile(r'(\d+)(\s)')
+FILE_NUMBER = re.compile(r'actor_assignments(\d+)\.txt$')
+
+
+def offset_for(file_num, rules):
+    """Return the offset of the first rule covering file_num, or None."""
+    for start, end, offset in rules:
+        if file_num >= start and (end is None or file_num <= end):
+            return offset
+    return None
+
+
+def add_offset_to_numbers(filepath, offset):
+    """Add offset to the leading number of every line of filepath, atomically."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filepath)}.", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(filepath)))
+    try:
+        with open(filepath, 'r', encoding='utf-8') as src, os.fdopen(fd, 'w', encoding='utf-8') as dst:
+            for line in src:
+                match = LINE_NUMBER.match(line)
+                if match:
+                    line = str(int(match.group(1)) + offset) + line[match.end(1):]
+                dst.write(line)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    print(f"Processed: {filepath}")
+
+
+def find_files(dirs, rules):
+    """Return (filepath, offset) for every assignment file of dirs a rule covers."""
+    jobs = []
+    for directory in dirs:
+        for filepath in sorted(glob.glob(os.path.join(directory, "actor_assignments*.txt"))):
+            # Extract file number
+            match = FILE_NUMBER.search(filepath)
+            if match:
+                offset = offset_for(int(match.group(1)), rules)
+                if offset is not None:
+                    jobs.append((filepath, offset))
+    return jobs
+
+
+def renumber_dirs(dirs, rules, max_workers=None):
+    """Renumber the assignment files of every folder in dirs, in parallel."""
+    jobs = find_files(dirs, rules)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = [pool.submit(add_offset_to_numbers, filepath, offset) for filepath, offset in jobs]
+        for result in results:
+            result.result()
+
+
+def parse_rule(text):
+    """Parse a START:END:OFFSET rule; END may be left empty for no end."""
+    try:
+        start, end, offset = text.split(':')
+        return int(start), int(end) if end else None, int(offset)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rule {text!r}, expected START:END:OFFSET")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shift the line numbers in actor assignment files.")
+    parser.add_argument('dirs', nargs='+', help="actor folders to renumber")
+    parser.add_argument('--rule', type=parse_rule, action='append', required=True,
+                        help="START:END:OFFSET, adds OFFSET to files START to END (END optional)")
+    args = parser.parse_args(argv)
+    renumber_dirs(args.dirs, args.rule)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+script_index.py - Find the lines of a script, or the script of a line.
+
+Reads the script index that fun_lines.py writes next to
+all_lines_numbered.txt (all_scripts_index.json: script id -> line numbers
+and line number -> script id), so a lookup never re-reads the assignment
+files. Script ids are the ones of the Script:/Source: lines, as
+role_assignments.csv has them (3d7130a0, not 3d7130a0_script).
+
+Usage: script_index.py DIR [SCRIPT_ID ...] [--line N ...] [--text] [--count]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from fun_lines import OUTPUT_NAME, SCRIPT_INDEX_NAME
+
+
+def load_script_index(index_file):
+    """Return the (script id -> line numbers, line number -> script id) mappings of a script index."""
+    with open(index_file, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    return index['scripts'], {int(num): script for num, script in index['lines'].items()}
+
+
+def read_output(output_file):
+    """Return {line_num: text} of an all_lines_numbered.txt file."""
+    lines = {}
+    with open(output_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            num, _, text = line.rstrip('\n').partition('  ')
+            lines[int(num)] = text
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the lines of a script, or the script of a line.")
+    parser.add_argument('path', help="actor folder")
+    parser.add_argument('scripts', nargs='*', metavar='SCRIPT_ID', help="print the line numbers of these scripts")
+    parser.add_argument('--line', type=int, action='append', default=[], help="print the script id of line N")
+    parser.add_argument('--text', action='store_true', help="print the text of each line too")
+    parser.add_argument('--count', action='store_true', help="print how many lines each script has")
+    args = parser.parse_args(argv)
+
+    index_file = os.path.join(args.path, SCRIPT_INDEX_NAME)
+    if not os.path.exists(index_file):
+        parser.error(f"{index_file} not found; run fun-lines build {args.path} first")
+    script_lines, line_scripts = load_script_index(index_file)
+    texts = read_output(os.path.join(args.path, OUTPUT_NAME)) if args.text else {}
+
+    if args.count:
+        for script, nums in sorted(script_lines.items(), key=lambda item: (-len(item[1]), item[0])):
+            print(f"{len(nums):>6}  {script}")
+    for script in args.scripts:
+        if script.endswith('_script'):
+            script = script[:-len('_script')]
+        for num in script_lines.get(script, []):
+            print(f"{num}  {texts[num]}" if args.text else num)
+    for num in args.line:
+        script = line_scripts.get(num, '-')
+        print(f"{num}  {script}  {texts.get(num, '')}" if args.text else f"{num}  {script}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+search_lines.py - Find which actor recorded a line, across all actor folders.
+
+Keeps an inverted index (token and token pair -> lines) of every actor's
+all_lines_numbered.txt and of the *_lines.txt files at the repo root
+(german_autumn_lines.txt), one shard per source under .index/. A shard
+is rebuilt only when its source changed size or modification time, so
+rebuilding one actor re-indexes just that actor.
+
+Words match case-insensitively and as a phrase; a direction tag such as
+[whisper] is a single token, so "[whisper] okay" finds lines where that
+tag comes right before "okay". Postings of adjacent token pairs make
+phrases of common words as cheap to look up as rare ones.
+
+Usage: search_lines.py [--root DIR] [--limit N] QUERY [QUERY ...]
+"""
+
+import re
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+
+from fun_lines import OUTPUT_NAME
+
+INDEX_VERSION = 2
+INDEX_DIR = ".index"
+# Direction tags are one token each; everything else is split into words
+TOKEN = re.compile(r'\[[^\]\n]*\]|\w+')
+# "N  text" in the numbered output, "N text" in german_autumn_lines.txt
+NUMBERED = re.compile(r'(\d+)\s+(.*)')
+
+
+def tokenize(text):
+    """Return the case-folded word and tag tokens of text."""
+    return [' '.join(token.split()).casefold() for token in TOKEN.findall(text)]
+
+
+def index_keys(tokens):
+    """Return the postings keys of a token list: the tokens alone for one
+    token, else every adjacent pair (tokens never contain a tab).
+    """
+    if len(tokens) == 1:
+        return set(tokens)
+    return {f"{a}\t{b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def find_sources(root):
+    """Map each source name (actor folder or file stem) to the numbered file it indexes."""
+    sources = {}
+    for filepath in sorted(glob.glob(os.path.join(root, '*', OUTPUT_NAME))):
+        sources[os.path.basename(os.path.dirname(filepath))] = filepath
+    for filepath in sorted(glob.glob(os.path.join(root, '*_lines.txt'))):
+        sources[os.path.splitext(os.path.basename(filepath))[0]] = filepath
+    return sources
+
+
+def source_stamp(filepath):
+    stat = os.stat(filepath)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def build_shard(filepath):
+    """Return the index shard of one numbered file: its lines and token postings."""
+    lines = []
+    postings = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = NUMBERED.match(line.rstrip('\n'))
+            if not match:
+                continue
+            index = len(lines)
+            lines.append([int(match.group(1)), match.group(2)])
+            tokens = tokenize(match.group(2))
+            for key in set(tokens) | index_keys(tokens):
+                postings.setdefault(key, []).append(index)
+    return {'version': INDEX_VERSION, 'stamp': source_stamp(filepath), 'lines': lines, 'postings': postings}
+
+
+class LineIndex:
+    """The index shards of every source under root, rebuilt as their sources change."""
+
+    def __init__(self, root):
+        self.root = root
+        self.index_dir = os.path.join(root, INDEX_DIR)
+        self.shards = {}
+
+    def refresh(self):
+        """Load every shard, rebuilding those whose source changed; return the rebuilt names."""
+        rebuilt = []
+        sources = find_sources(self.root)
+        for name in set(self.shards) - set(sources):
+            del self.shards[name]
+        for name, filepath in sources.items():
+            stamp = source_stamp(filepath)
+            shard = self.shards.get(name) or self.load_shard(name)
+            if shard is None or shard['version'] != INDEX_VERSION or shard['stamp'] != stamp:
+                shard = build_shard(filepath)
+                self.save_shard(name, shard)
+                rebuilt.append(name)
+            self.shards[name] = shard
+        return rebuilt
+
+    def shard_path(self, name):
+        return os.path.join(self.index_dir, f"{name}.json")
+
+    def load_shard(self, name):
+        try:
+            with open(self.shard_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_shard(self, name, shard):
+        os.makedirs(self.index_dir, exist_ok=True)
+        path = self.shard_path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(shard, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def search(self, query):
+        """Return (source, line_num, text) for every line containing the tokens of query in order."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        keys = index_keys(tokens)
+        results = []
+        for name, shard in self.shards.items():
+            postings = shard['postings']
+            lists = [postings.get(key) for key in keys]
+            if not all(lists):
+                continue
+            # Intersect from the rarest key up
+            lists.sort(key=len)
+            candidates = set(lists[0])
+            for other in lists[1:]:
+                candidates.intersection_update(other)
+                if not candidates:
+                    break
+            for index in sorted(candidates):
+                line_num, text = shard['lines'][index]
+                # Pairs pin down phrases of up to two tokens; check longer ones
+                if len(tokens) <= 2 or contains_phrase(tokenize(text), tokens):
+                    results.append((name, line_num, text))
+        return results
+
+
+def contains_phrase(tokens, phrase):
+    """Return whether phrase occurs in tokens as a contiguous run."""
+    n = len(phrase)
+    return any(tokens[i:i + n] == phrase for i in range(len(tokens) - n + 1) if tokens[i] == phrase[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find which actor recorded a line, across all actor folders.")
+    parser.add_argument('queries', nargs='+', metavar='QUERY', help="words or [tags] to find, as a phrase")
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--limit', type=int, default=20, help="matches shown per query (default: 20)")
+    args = parser.parse_args(argv)
+
+    index = LineIndex(args.root)
+    rebuilt = index.refresh()
+    if rebuilt:
+        print(f"Indexed {', '.join(rebuilt)}")
+    for query in args.queries:
+        start = time.perf_counter()
+        results = index.search(query)
+        ms = (time.perf_counter() - start) * 1000
+        print(f"\n{query!r}: {len(results)} lines in {ms:.2f} ms")
+        for name, line_num, text in results[:args.limit]:
+            print(f"  {name}:{line_num}  {text}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+tag_index.py - Count and filter numbered lines by direction tag.
+
+Reads the tag index that fun_lines.py writes next to all_lines_numbered.txt
+(all_tags_index.json: normalized tag -> line numbers), so filtering never
+re-scans the lines. A numbered text file outside the actor folders, like
+german_autumn_lines.txt, is indexed into <name>_tags.tsv and
+<name>_tags_index.json next to it on first use, and again when it changes.
+
+Usage: tag_index.py PATH [--tag TAG ...] [--without TAG ...] [--count] [--language de]
+"""
+
+import re
+import os
+import csv
+import sys
+import json
+import argparse
+
+from fun_lines import TAG_INDEX_NAME, TAG_FIELDS, DEFAULT_LANGUAGE, direction_tags, write_tag_index
+
+# "N text" or "N  text" numbered lines
+NUMBERED = re.compile(r'(\d+)\s+(.*)')
+
+
+def normalize(tag):
+    """Return the normalized form of a tag given with or without brackets."""
+    return ' '.join(tag.strip().strip('[]').split()).casefold()
+
+
+def index_numbered_file(filepath, tags_file, index_file, language=DEFAULT_LANGUAGE):
+    """Write the tag table and tag index of a numbered text file."""
+    tag_lines = {}
+    with open(filepath, 'r', encoding='utf-8') as src, open(tags_file, 'w', encoding='utf-8', newline='') as dst:
+        writer = csv.writer(dst, delimiter='\t', lineterminator='\n')
+        writer.writerow(TAG_FIELDS)
+        for line in src:
+            match = NUMBERED.match(line.rstrip('\n'))
+            if not match:
+                continue
+            num = int(match.group(1))
+            for offset, tag, normalized in direction_tags(match.group(2)):
+                writer.writerow([num, tag, offset, normalized, language])
+                lines = tag_lines.setdefault(normalized, [])
+                if not lines or lines[-1] != num:
+                    lines.append(num)
+    write_tag_index(tag_lines, index_file, language)
+
+
+def index_path(path, language=DEFAULT_LANGUAGE):
+    """Return the tag index for an actor folder or a numbered file, indexing the file if needed."""
+    if os.path.isdir(path):
+        return os.path.join(path, TAG_INDEX_NAME)
+    stem = os.path.splitext(path)[0]
+    tags_file, index_file = f"{stem}_tags.tsv", f"{stem}_tags_index.json"
+    if not os.path.exists(index_file) or os.path.getmtime(index_file) < os.path.getmtime(path):
+        index_numbered_file(path, tags_file, index_file, language)
+    return index_file
+
+
+def load_tag_index(index_file):
+    """Return the normalized tag -> line numbers mapping of a tag index."""
+    with open(index_file, 'r', encoding='utf-8') as f:
+        return json.load(f)['tags']
+
+
+def filter_lines(tag_lines, tags=(), without=()):
+    """Return the sorted line numbers that have every tag in tags and none in without.
+
+    Without any tags, every line with at least one tag qualifies.
+    """
+    if tags:
+        selected = set(tag_lines.get(normalize(tags[0]), ()))
+        for tag in tags[1:]:
+            selected.intersection_update(tag_lines.get(normalize(tag), ()))
+    else:
+        selected = set().union(*tag_lines.values())
+    for tag in without:
+        selected.difference_update(tag_lines.get(normalize(tag), ()))
+    return sorted(selected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count and filter numbered lines by direction tag.")
+    parser.add_argument('path', help="actor folder, or a numbered text file such as german_autumn_lines.txt")
+    parser.add_argument('--tag', action='append', default=[], help="keep lines with this tag (repeatable)")
+    parser.add_argument('--without', action='append', default=[], help="drop lines with this tag (repeatable)")
+    parser.add_argument('--count', action='store_true', help="print how many lines have each tag")
+    parser.add_argument('--language', default=DEFAULT_LANGUAGE,
+                        help=f"language recorded when indexing a text file (default: {DEFAULT_LANGUAGE})")
+    args = parser.parse_args(argv)
+
+    tag_lines = load_tag_index(index_path(args.path, args.language))
+    if args.count:
+        for tag, lines in sorted(tag_lines.items(), key=lambda item: (-len(item[1]), item[0])):
+            print(f"{len(lines):>6}  [{tag}]")
+        return
+    for num in filter_lines(tag_lines, args.tag, args.without):
+        print(num)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,45 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from align_lines import build_alignment  # noqa: E402
+
+
+class BuildAlignmentTest(unittest.TestCase):
+    """build_alignment only pairs lines that share text."""
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.out_dir)
+
+    def write(self, name, lines):
+        path = os.path.join(self.out_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{num} {text}\n" for num, text in lines)
+        return path
+
+    def test_drifted_numbering(self):
+        english = self.write('en.txt', [
+            (1, "[nervously] My dog Bella ran into the park again."),
+            (2, "[sighs] The deadline moved to Friday, can you believe it?"),
+            (3, "[laughs] Marcus brought three pizzas to the meeting."),
+        ])
+        german = self.write('de.txt', [
+            # Line 2 translates English line 3; line 3 translates nothing
+            (1, "[nervös] Mein Hund Bella ist wieder in den park gerannt."),
+            (2, "[lacht] Marcus hat drei pizzas zum meeting mitgebracht."),
+            (3, "Eins, zwei, drei, Test, Test, funktioniert mein Mikro?"),
+        ])
+        pairs = build_alignment(german, english)
+        self.assertEqual([pair[:3] for pair in pairs],
+                         [[1, 1, 'number'], [2, 3, 'fuzzy']])
+
+    def test_unrelated_same_numbers(self):
+        english = self.write('en.txt', [(61, "[nervously] I'm so, so sorry about what happened earlier.")])
+        german = self.write('de.txt', [(61, "Ach, ich hab die ganze Nacht an diesem Projekt gearbeitet.")])
+        self.assertEqual(build_alignment(german, english), [[61, 61, 'unverified', None]])
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench import generate_corpus  # noqa: E402
+from fun_lines import (OUTPUT_NAME, SCRIPT_INDEX_NAME, TAG_INDEX_NAME, STAGES, actor_files,  # noqa: E402
+                       iter_entries, merge_entries, parse_content, parse_file, process_files, read_lines,
+                       read_segments)
+
+
+class ProcessFilesReportTest(unittest.TestCase):
+    """process_files with a report_file on a real actor folder."""
+
+    actor_dir = os.path.join(ROOT, 'Austin_cs_tagless')
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.out_dir)
+
+    def out(self, name):
+        return os.path.join(self.out_dir, name)
+
+    def test_report_with_every_output(self):
+        files = actor_files([self.actor_dir])[self.actor_dir]
+        process_files(files, self.out(OUTPUT_NAME), texts_file=self.out('all_texts.txt'),
+                      plain_file=self.out('all_texts_plain.txt'), report_file=self.out('report.json'),
+                      stats_file=self.out('actor_stats.txt'), tags_file=self.out('all_tags.tsv'),
+                      tag_index_file=self.out(TAG_INDEX_NAME), script_index_file=self.out(SCRIPT_INDEX_NAME))
+
+        # Collecting timings does not change the output
+        process_files(files, self.out('plain_run.txt'))
+        with open(self.out('plain_run.txt'), encoding='utf-8') as f:
+            expected = f.read()
+        with open(self.out(OUTPUT_NAME), encoding='utf-8') as f:
+            self.assertEqual(f.read(), expected)
+
+        with open(self.out('report.json'), encoding='utf-8') as f:
+            stages = json.load(f)['stages']
+        self.assertEqual(list(stages), [name for name in STAGES if name in stages])
+        # The merge stage counts the text of the merged entries, not their category or script
+        self.assertEqual(stages['merge']['chars'], 92622)
+        self.assertEqual(stages['merge']['calls'], 480)
+
+
+
+class ReadSegmentsTest(unittest.TestCase):
+    """Large files are cut into segments that parse like the whole file."""
+
+    segment_size = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus_dir = tempfile.mkdtemp()
+        # One double-spaced file of every block layout, one single-spaced combined file of dialogue
+        cls.files = generate_corpus(cls.corpus_dir, 6000, files=2, seed=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.corpus_dir)
+
+    def check_segments(self, filepath):
+        segments = list(read_segments(filepath, self.segment_size))
+        self.assertEqual('\n'.join(segments), ''.join(read_lines(filepath)))
+        self.assertGreater(len(segments), os.path.getsize(filepath) // (self.segment_size * 4))
+        self.assertEqual(list(parse_file(filepath, segment_size=self.segment_size)),
+                         parse_content(''.join(read_lines(filepath))))
+        return segments
+
+    def test_mixed_layouts(self):
+        self.check_segments(self.files[0])
+
+    def test_combined_dialogue(self):
+        combined = self.files[-1]
+        self.assertIn('_2_3_4', combined)
+        segments = self.check_segments(combined)
+        # Cut before the first "Character N:" line past segment_size
+        self.assertLess(max(map(len, segments)), self.segment_size * 2)
+
+
+
+class MergeEntriesTest(unittest.TestCase):
+
+    def test_line_numbers_past_64_bits(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+            f.write("5 hi\n12345678901234567890123 call me\n18446744073709551616 edge\n"
+                    "18446744073709551615 max\n7 bye\n12345678901234567890123 again\n")
+        self.addCleanup(os.remove, f.name)
+        for run_size in (2, 100):
+            merged = list(merge_entries(iter_entries([f.name]), run_size=run_size))
+            self.assertEqual([(num, text) for num, text, _, _ in merged],
+                             [(5, 'hi'), (7, 'bye'), (2**64 - 1, 'max'), (2**64, 'edge'),
+                              (12345678901234567890123, 'call me')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+watch.py - Rebuild actor folders as their assignment files change.
+
+Polls the actor_assignments*.txt files of the watched folders (size and
+mtime, a stat per file and nothing else) and rebuilds a folder's outputs
+once its files have been quiet for the debounce time, so a save that
+touches a file several times rebuilds once. Rebuilds run in this process
+through the parse cache: only the file that changed is parsed again, the
+others are read back from .cache/. Outputs are replaced atomically, so
+readers never see a half-written all_lines_numbered.txt.
+
+Usage: watch.py [DIR|GLOB ...] [--interval SECONDS] [--debounce SECONDS]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+from fun_lines import CACHE_DIR, build_actor
+from fun_lines_cli import expand_dirs
+
+
+def snapshot(dirs):
+    """Return {actor_dir: {filepath: (size, mtime_ns)}} of the assignment files of dirs."""
+    stamps = {}
+    for actor_dir in dirs:
+        files = {}
+        for filepath in sorted(glob.glob(os.path.join(actor_dir, 'actor_assignments*.txt'))):
+            try:
+                stat = os.stat(filepath)
+            except FileNotFoundError:
+                continue
+            files[filepath] = (stat.st_size, stat.st_mtime_ns)
+        stamps[actor_dir] = files
+    return stamps
+
+
+def rebuild(actor_dir, files):
+    start = time.perf_counter()
+    try:
+        build_actor(actor_dir, sorted(files), CACHE_DIR)
+    except Exception as exc:
+        # A file caught mid-save is picked up again on its next change
+        print(f"{actor_dir}: rebuild failed: {exc}", file=sys.stderr)
+        return
+    print(f"{actor_dir}: rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms", flush=True)
+
+
+def watch(dirs, interval=0.5, debounce=0.3):
+    """Rebuild each of dirs whenever its assignment files change, until interrupted."""
+    stamps = snapshot(dirs)
+    # actor_dir -> time of its last seen change
+    pending = {}
+    while True:
+        time.sleep(interval)
+        current = snapshot(dirs)
+        now = time.monotonic()
+        for actor_dir, files in current.items():
+            if files != stamps[actor_dir]:
+                pending[actor_dir] = now
+        stamps = current
+        for actor_dir, changed in list(pending.items()):
+            if now - changed >= debounce:
+                del pending[actor_dir]
+                if stamps[actor_dir]:
+                    rebuild(actor_dir, stamps[actor_dir])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild actor folders as their assignment files change.")
+    parser.add_argument('dirs', nargs='*', metavar='DIR',
+                        help="actor folders or glob patterns (default: every actor folder under the current one)")
+    parser.add_argument('--interval', type=float, default=0.5, help="seconds between polls (default: 0.5)")
+    parser.add_argument('--debounce', type=float, default=0.3,
+                        help="seconds a folder must be quiet before it is rebuilt (default: 0.3)")
+    args = parser.parse_args(argv)
+
+    if args.dirs:
+        dirs = expand_dirs(args.dirs)
+    else:
+        dirs = sorted({os.path.dirname(path) for path in glob.glob(os.path.join('*', 'actor_assignments*.txt'))})
+    if not dirs:
+        parser.error("no actor folders to watch")
+    print(f"Watching {len(dirs)} actor folders (Ctrl-C to stop)", flush=True)
+    try:
+        watch(dirs, args.interval, args.debounce)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])